@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+"""
+Command line benchmarks that run without opening a tcod window.
+
+    python benchmark.py procgen --floors 10 --json procgen.json
+    python benchmark.py procgen --floors 10 --compare procgen.json
+    python benchmark.py procgen --population --floors 3
+    python benchmark.py render --sizes 80x43 1000x1000
+    python benchmark.py scaling --sizes 80x43 256x256 512x512 1024x1024
+    python benchmark.py frames --inputs 500 --dump frame.npy
+    python benchmark.py chase --monsters 5 50 500
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import tcod
+
+from actions import MeleeAction, MovementAction
+from engine import Engine
+import entity_factories
+import exceptions
+from floor_cache import FloorCache, floor_cache_from_environment
+import game_loop
+from game_map import GameMap, GameWorld
+import input_handlers
+import procgen
+import setup_game
+import tile_types
+
+PROCGEN_TYPES = ["Rectangular Room", "Cellular Automata", "Simplex Noise"]
+
+# map sizes and room counts the population benchmark runs at: the default floor, and a large one.
+POPULATION_SIZES = [(80, 43, 30), (400, 400, 500)]
+
+FLOOR_CACHE_HELP = (
+    "Directory to cache generated floors in, so later runs load them instead of generating them again.  Defaults to "
+    "the ROGUELIKE_FLOOR_CACHE environment variable."
+)
+
+# summary fields compare mode checks, where a bigger number is worse.  timings vary from run to run even for the same
+# code, so they are checked against their own, wider tolerance than the fields that are the same every run.
+COMPARED_FIELDS = ["mean_attempts", "max_peak_memory_bytes"]
+COMPARED_TIMING_FIELDS = ["median_seconds"]
+
+
+def benchmark_floor(spec: procgen.FloorSpec, measure_memory: bool = True, repeat: int = 3) -> Dict:
+    """
+    Generate one floor and return its measurements.  The floor is generated repeat times and the fastest time is
+    kept, since anything slower than that is other work on the machine getting in the way.
+    """
+    game_map, seconds = procgen.generate_detached_floor(spec)
+    for _ in range(repeat - 1):
+        seconds = min(seconds, procgen.generate_detached_floor(spec)[1])
+
+    peak_memory = None
+    if measure_memory:
+        # floors are deterministic, so the same floor is generated again under tracemalloc to keep its overhead
+        # out of the timing.
+        tracemalloc.start()
+        procgen.generate_detached_floor(spec)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "procgen_type": spec.procgen_type,
+        "floor": spec.floor,
+        "seed": spec.seed,
+        "seconds": seconds,
+        "attempts": game_map.generation_attempts,
+        "accessible_tiles": int(game_map.walkable().sum()),
+        "entities": len(game_map.entities),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def summarize(records: List[Dict]) -> Dict[str, Dict]:
+    """Return summary statistics for each procgen type in records."""
+    summary = {}
+    for procgen_type in dict.fromkeys(record["procgen_type"] for record in records):
+        floors = [record for record in records if record["procgen_type"] == procgen_type]
+        memory = [record["peak_memory_bytes"] for record in floors if record["peak_memory_bytes"] is not None]
+        summary[procgen_type] = {
+            "floors": len(floors),
+            "median_seconds": statistics.median(record["seconds"] for record in floors),
+            "max_seconds": max(record["seconds"] for record in floors),
+            "mean_attempts": statistics.mean(record["attempts"] for record in floors),
+            "mean_accessible_tiles": statistics.mean(record["accessible_tiles"] for record in floors),
+            "mean_entities": statistics.mean(record["entities"] for record in floors),
+            "max_peak_memory_bytes": max(memory) if memory else None,
+        }
+    return summary
+
+
+def find_regressions(
+        summary: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, time_tolerance: float
+) -> List[str]:
+    """
+    Return a description of every compared field that got worse than the baseline by more than tolerance, or by more
+    than time_tolerance for timings.
+    """
+    regressions = []
+    for procgen_type, results in summary.items():
+        if procgen_type not in baseline:
+            continue
+        for field in COMPARED_FIELDS + COMPARED_TIMING_FIELDS:
+            current, previous = results.get(field), baseline[procgen_type].get(field)
+            if current is None or not previous:
+                continue
+            allowed = time_tolerance if field in COMPARED_TIMING_FIELDS else tolerance
+            if current > previous * (1 + allowed):
+                regressions.append(
+                    f"{procgen_type}: {field} {current:.4g} vs baseline {previous:.4g} "
+                    f"(+{current / previous - 1:.0%})"
+                )
+    return regressions
+
+
+def print_summary(summary: Dict[str, Dict]) -> None:
+    for procgen_type, results in summary.items():
+        memory = results["max_peak_memory_bytes"]
+        print(
+            f"{procgen_type:<18} {results['floors']:>3} floors  "
+            f"median {results['median_seconds'] * 1000:8.1f} ms  max {results['max_seconds'] * 1000:8.1f} ms  "
+            f"attempts {results['mean_attempts']:5.2f}  accessible {results['mean_accessible_tiles']:8.0f}  "
+            f"entities {results['mean_entities']:6.1f}  "
+            f"peak memory {'-' if memory is None else f'{memory / 1024 / 1024:.1f} MiB'}"
+        )
+
+
+def time_population(
+        width: int, height: int, max_rooms: int, single_pass: bool, seed: int, floor: int, repeat: int
+) -> Tuple[float, int]:
+    """
+    Return the fastest of repeat times generate_rectangular_dungeon took to build and populate a floor, and how many
+    entities it placed.
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        engine = Engine(
+            player=copy.deepcopy(entity_factories.player),
+            final_boss=copy.deepcopy(entity_factories.grim_reaper),
+            seed=seed,
+        )
+        engine.game_world = GameWorld(
+            engine=engine,
+            map_width=width,
+            map_height=height,
+            max_rooms=max_rooms,
+            room_min_size=6,
+            room_max_size=10,
+            current_floor=floor,
+        )
+        start = time.perf_counter()
+        game_map = procgen.generate_rectangular_dungeon(
+            max_rooms=max_rooms,
+            room_min_size=6,
+            room_max_size=10,
+            map_width=width,
+            map_height=height,
+            engine=engine,
+            rng=procgen.floor_rng(seed, floor),
+            single_pass=single_pass,
+        )
+        seconds = min(seconds, time.perf_counter() - start)
+    return seconds, len(game_map.entities)
+
+
+def run_population(args: argparse.Namespace) -> int:
+    """Time populating Rectangular Room floors once after carving against after every room, see procgen."""
+    for width, height, max_rooms in POPULATION_SIZES:
+        results = {}
+        for single_pass in (False, True):
+            floors = [
+                time_population(width, height, max_rooms, single_pass, args.seed, floor, args.repeat)
+                for floor in range(1, args.floors + 1)
+            ]
+            results[single_pass] = (
+                statistics.median(seconds for seconds, _ in floors), statistics.mean(count for _, count in floors)
+            )
+        (per_room, per_room_entities), (single, single_entities) = results[False], results[True]
+        print(
+            f"{f'{width}x{height}':<10} {max_rooms:>4} rooms  per room {per_room * 1000:9.1f} ms "
+            f"({per_room_entities:6.1f} entities)  single pass {single * 1000:8.1f} ms "
+            f"({single_entities:6.1f} entities)  speedup {per_room / single:5.1f}x"
+        )
+    return 0
+
+
+def run_procgen(args: argparse.Namespace) -> int:
+    if args.population:
+        return run_population(args)
+
+    specs = [
+        procgen.FloorSpec(
+            procgen_type=procgen_type,
+            seed=args.seed,
+            floor=floor,
+            map_width=args.width,
+            map_height=args.height,
+            max_rooms=args.max_rooms or procgen.max_rooms_for(args.width, args.height),
+            room_min_size=args.room_min_size,
+            room_max_size=args.room_max_size,
+        )
+        for procgen_type in args.types
+        for floor in range(1, args.floors + 1)
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        records = list(pool.map(
+            benchmark_floor, specs, [not args.no_memory] * len(specs), [args.repeat] * len(specs)
+        ))
+    print(f"generated {len(records)} floors in {time.perf_counter() - start:.1f}s")
+
+    summary = summarize(records)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"floors": records, "summary": summary}, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["summary"]
+        regressions = find_regressions(summary, baseline, args.tolerance, args.time_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+
+    return 0
+
+
+def legacy_render(game_map: GameMap, console: tcod.console.Console) -> None:
+    """
+    GameMap.render as it was before it was vectorized, kept as the baseline for the render benchmark.  It draws the
+    same camera window as GameMap.render, so the two frames can be compared.
+    """
+    x_start, y_start, x_end, y_end = game_map.camera_window()
+
+    for x in range(x_start, x_end):
+        for y in range(y_start, y_end):
+            if game_map.visible[x, y]:
+                graphics = "light"
+            elif game_map.explored[x, y]:
+                graphics = "dark"
+            else:
+                continue
+            console.tiles_rgb[x - x_start, y - y_start] = tile_types.palette[game_map.tiles[x, y]][graphics]
+
+    for entity in sorted(game_map.entities, key=lambda x: x.render_order.value):
+        if game_map.visible[entity.x, entity.y]:
+            console.print(x=entity.x - x_start, y=entity.y - y_start, string=entity.char, fg=entity.color)
+
+
+def playable_engine(
+        width: int,
+        height: int,
+        seed: int,
+        procgen_type: str = "Rectangular Room",
+        floor_cache: Optional[FloorCache] = None,
+) -> Engine:
+    """
+    Return an engine on a freshly generated floor, or one loaded from floor_cache, with the field of view computed
+    and every tile explored, so the camera draws every cell.
+    """
+    engine = Engine(
+        player=copy.deepcopy(entity_factories.player),
+        final_boss=copy.deepcopy(entity_factories.grim_reaper),
+        seed=seed,
+    )
+    engine.procgen_type = procgen_type
+    engine.game_world = GameWorld(
+        engine=engine,
+        map_width=width,
+        map_height=height,
+        max_rooms=procgen.max_rooms_for(width, height),
+        room_min_size=6,
+        room_max_size=10,
+        current_floor=1,
+        floor_cache=floor_cache,
+    )
+    engine.game_map = engine.game_world.build_floor(engine.game_world.floor_spec(1))
+    engine.update_fov()
+    engine.game_map.explored[...] = True
+    return engine
+
+
+def time_frames(render: Callable[[tcod.console.Console], None], frames: int) -> List[float]:
+    console = tcod.console.Console(80, 50, order="F")
+    frame_times = []
+    for _ in range(frames):
+        console.clear()
+        start = time.perf_counter()
+        render(console)
+        frame_times.append(time.perf_counter() - start)
+    return frame_times
+
+
+def time_turns(engine: Engine, turns: int) -> List[float]:
+    """Time the enemy turns and field of view update that follow each player turn, with the player waiting."""
+    turn_times = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        engine.handle_enemy_turns()
+        engine.update_fov()
+        turn_times.append(time.perf_counter() - start)
+    return turn_times
+
+
+def scripted_inputs(count: int) -> Iterator[tcod.event.Event]:
+    """
+    Yield count events that play like someone exploring: walking in a square, waiting, looking around with the
+    mouse, and opening and closing the inventory and message history.
+    """
+    script = [
+        *[game_loop.key_press(tcod.event.KeySym.RIGHT)] * 3,
+        *[game_loop.key_press(tcod.event.KeySym.DOWN)] * 3,
+        game_loop.mouse_motion(10, 10),
+        game_loop.mouse_motion(11, 10),
+        game_loop.mouse_motion(11, 10),
+        *[game_loop.key_press(tcod.event.KeySym.LEFT)] * 3,
+        *[game_loop.key_press(tcod.event.KeySym.UP)] * 3,
+        game_loop.key_press(tcod.event.KeySym.PERIOD),
+        game_loop.key_press(tcod.event.KeySym.I),
+        game_loop.key_press(tcod.event.KeySym.ESCAPE),
+        game_loop.key_press(tcod.event.KeySym.V),
+        game_loop.key_press(tcod.event.KeySym.ESCAPE),
+    ]
+    for i in range(count):
+        yield script[i % len(script)]
+
+
+def chase_arena(monsters: int, seed: int) -> Engine:
+    """
+    Return an engine on a map the size of the active region, scattered with pillars, with the player in the middle
+    and monsters all around.  Every tile is marked visible, so every monster can see the player and chases them.
+    """
+    engine = Engine(
+        player=copy.deepcopy(entity_factories.player),
+        final_boss=copy.deepcopy(entity_factories.grim_reaper),
+        seed=seed,
+    )
+    # the monsters don't die, so the player is made tough enough to outlast them.
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 1_000_000
+    viewport = engine.viewport
+    width = viewport.camera_width + 2 * viewport.active_margin
+    height = viewport.camera_height + 2 * viewport.active_margin
+
+    rng = np.random.default_rng(seed)
+    game_map = GameMap(engine, width, height)
+    game_map.tiles[1:-1, 1:-1] = np.where(rng.random((width - 2, height - 2)) < 0.15, tile_types.wall, tile_types.floor)
+    game_map.tiles[width // 2, height // 2] = tile_types.floor
+    engine.player.place(width // 2, height // 2, game_map)
+    engine.game_map = game_map
+
+    free_tiles = np.argwhere(game_map.walkable()).tolist()
+    for i in rng.permutation(len(free_tiles))[:monsters].tolist():
+        x, y = free_tiles[i]
+        if max(abs(x - engine.player.x), abs(y - engine.player.y)) > 1:
+            entity_factories.orc.spawn(game_map, x, y)
+
+    game_map.visible[...] = True
+    game_map.explored[...] = True
+    return engine
+
+
+def legacy_chase_turn(engine: Engine) -> None:
+    """The monsters' turns as HostileEnemy took them before the distance map, each finding its own path."""
+    region = engine.active_region()
+    target = engine.player
+    for actor in engine.game_map.get_actors_in_region(region):
+        if actor is target:
+            continue
+        dx, dy = target.x - actor.x, target.y - actor.y
+        try:
+            if max(abs(dx), abs(dy)) <= 1:
+                MeleeAction(actor, dx, dy).perform()
+                continue
+            path = actor.ai.get_path_to(target.x, target.y, region)
+            if path:
+                MovementAction(actor, path[0][0] - actor.x, path[0][1] - actor.y).perform()
+        except exceptions.Impossible:
+            pass
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    width, height = size.lower().split("x")
+    return int(width), int(height)
+
+
+def floor_cache_for(args: argparse.Namespace) -> Optional[FloorCache]:
+    """Return the floor cache --floor-cache names, or the one ROGUELIKE_FLOOR_CACHE names, or None."""
+    if args.floor_cache:
+        return FloorCache(args.floor_cache)
+    return floor_cache_from_environment()
+
+
+def run_render(args: argparse.Namespace) -> int:
+    floor_cache = floor_cache_for(args)
+    for width, height in args.sizes:
+        game_map = playable_engine(width, height, args.seed, floor_cache=floor_cache).game_map
+
+        # both paths have to draw the same frame for the timings to mean anything.
+        expected, actual = tcod.console.Console(80, 50, order="F"), tcod.console.Console(80, 50, order="F")
+        legacy_render(game_map, expected)
+        GameMap.render(game_map, actual)
+        if not np.array_equal(expected.tiles_rgb, actual.tiles_rgb):
+            print(f"{width}x{height}: GameMap.render drew a different frame than the legacy loop")
+            return 1
+
+        legacy = statistics.median(time_frames(lambda console: legacy_render(game_map, console), args.frames))
+        vectorized = statistics.median(time_frames(game_map.render, args.frames))
+        print(
+            f"{f'{width}x{height}':<10} legacy {legacy * 1000:8.3f} ms  vectorized {vectorized * 1000:8.3f} ms  "
+            f"speedup {legacy / vectorized:6.1f}x"
+        )
+
+    if floor_cache is not None:
+        print(floor_cache.summary())
+    return 0
+
+
+def run_scaling(args: argparse.Namespace) -> int:
+    floor_cache = floor_cache_for(args)
+    for width, height in args.sizes:
+        engine = playable_engine(width, height, args.seed, args.type, floor_cache)
+        tile_memory = engine.game_map.tiles.nbytes
+        # what the map took as a dense array of tile_dt records, before it was chunked and stored as palette ids.
+        dense_tile_memory = width * height * tile_types.tile_dt.itemsize
+        frame = statistics.median(time_frames(engine.render, args.frames))
+        turn = statistics.median(time_turns(engine, args.frames))
+        print(
+            f"{f'{width}x{height}':<10} {len(engine.game_map.entities):>6} entities  "
+            f"frame {frame * 1000:7.3f} ms  turn {turn * 1000:7.3f} ms  "
+            f"tiles {tile_memory / 1024 / 1024:6.1f} MiB of {dense_tile_memory / 1024 / 1024:.1f} MiB dense records"
+        )
+
+    if floor_cache is not None:
+        print(floor_cache.summary())
+    return 0
+
+
+def run_frames(args: argparse.Namespace) -> int:
+    width, height = args.size
+    # the procgen type, and so the floor, is picked with random, so seeding it keeps runs comparable and lets them
+    # share cached floors.
+    random.seed(args.seed)
+    engine = setup_game.new_game(
+        seed=args.seed, floor_cache=floor_cache_for(args), map_width=width, map_height=height, pregenerate=False
+    )
+    # the script doesn't fight back, so the player is made tough enough to play all of it.
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 1_000_000
+    game = game_loop.HeadlessGame(input_handlers.MainGameEventHandler(engine))
+    game.render()
+
+    frame_times = []
+    for event in scripted_inputs(args.inputs):
+        frame_times += game.play([event])
+        if isinstance(game.handler, input_handlers.GameOverEventHandler):
+            print(f"The player died after {len(frame_times)} inputs.")
+            break
+
+    frame_times.sort()
+    print(
+        f"{len(frame_times)} inputs, {game.rendered_frames} frames rendered, {game.skipped_frames} skipped  "
+        f"median {statistics.median(frame_times) * 1000:.3f} ms  "
+        f"p95 {frame_times[int(len(frame_times) * 0.95)] * 1000:.3f} ms  "
+        f"max {frame_times[-1] * 1000:.3f} ms"
+    )
+    print(engine.debug_summary())
+
+    if args.dump:
+        np.save(args.dump, game.frame())
+    return 0
+
+
+def run_chase(args: argparse.Namespace) -> int:
+    for monsters in args.monsters:
+        legacy_engine = chase_arena(monsters, args.seed)
+        engine = chase_arena(monsters, args.seed)
+        chasing = len(engine.game_map.actors) - 1
+
+        legacy_times, turn_times = [], []
+        for _ in range(args.turns):
+            start = time.perf_counter()
+            legacy_chase_turn(legacy_engine)
+            legacy_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            engine.handle_enemy_turns()
+            turn_times.append(time.perf_counter() - start)
+
+        legacy = statistics.median(legacy_times)
+        shared = statistics.median(turn_times)
+        print(
+            f"{chasing:>5} monsters  path per monster {legacy * 1000:8.3f} ms  shared distance map "
+            f"{shared * 1000:8.3f} ms  speedup {legacy / shared:5.1f}x  "
+            f"({engine.player_distance_map.computes} distance maps in {args.turns} turns)"
+        )
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    procgen_parser = subparsers.add_parser("procgen", help="Generate floors in a process pool and measure them.")
+    procgen_parser.add_argument("--floors", type=int, default=10, help="Floors to generate per procgen type.")
+    procgen_parser.add_argument("--types", nargs="+", default=PROCGEN_TYPES, choices=PROCGEN_TYPES)
+    procgen_parser.add_argument("--seed", type=int, default=0, help="Run seed the floors are derived from.")
+    procgen_parser.add_argument("--width", type=int, default=80)
+    procgen_parser.add_argument("--height", type=int, default=43)
+    procgen_parser.add_argument(
+        "--max-rooms", type=int, default=None, help="Defaults to the room density the game uses for the map size."
+    )
+    procgen_parser.add_argument("--room-min-size", type=int, default=6)
+    procgen_parser.add_argument("--room-max-size", type=int, default=10)
+    procgen_parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to CPU count.")
+    procgen_parser.add_argument(
+        "--repeat", type=int, default=3, help="Times each floor is generated, keeping the fastest time."
+    )
+    procgen_parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurement.")
+    procgen_parser.add_argument(
+        "--population",
+        action="store_true",
+        help="Instead, time Rectangular Room floors populated once after carving against after every room, on an "
+             "80x43 map with 30 rooms and a 400x400 map with 500.",
+    )
+    procgen_parser.add_argument("--json", help="Write every floor and the summary to this JSON file.")
+    procgen_parser.add_argument("--csv", help="Write every floor to this CSV file.")
+    procgen_parser.add_argument("--compare", help="JSON file from an earlier run to check for regressions against.")
+    procgen_parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Fraction the attempts or peak memory may grow before they are flagged.",
+    )
+    procgen_parser.add_argument(
+        "--time-tolerance", type=float, default=0.5, help="Fraction the median time may grow before it is flagged."
+    )
+    procgen_parser.set_defaults(run=run_procgen)
+
+    render_parser = subparsers.add_parser(
+        "render", help="Time GameMap.render against the old per cell loop on an offscreen console."
+    )
+    render_parser.add_argument(
+        "--sizes", nargs="+", type=parse_size, default=[(80, 43), (1000, 1000)], help="Map sizes, as WIDTHxHEIGHT."
+    )
+    render_parser.add_argument("--frames", type=int, default=200, help="Frames to time per size and render path.")
+    render_parser.add_argument("--seed", type=int, default=0, help="Run seed the floors are derived from.")
+    render_parser.add_argument("--floor-cache", help=FLOOR_CACHE_HELP)
+    render_parser.set_defaults(run=run_render)
+
+    scaling_parser = subparsers.add_parser(
+        "scaling", help="Time whole frames and enemy turns as the map grows, to check they stay flat."
+    )
+    scaling_parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=parse_size,
+        default=[(80, 43), (256, 256), (512, 512), (1024, 1024)],
+        help="Map sizes, as WIDTHxHEIGHT.",
+    )
+    scaling_parser.add_argument("--frames", type=int, default=100, help="Frames and turns to time per size.")
+    scaling_parser.add_argument("--type", default="Rectangular Room", choices=PROCGEN_TYPES)
+    scaling_parser.add_argument("--seed", type=int, default=0, help="Run seed the floors are derived from.")
+    scaling_parser.add_argument("--floor-cache", help=FLOOR_CACHE_HELP)
+    scaling_parser.set_defaults(run=run_scaling)
+
+    frames_parser = subparsers.add_parser(
+        "frames", help="Play scripted input through the real game loop on an offscreen console, timing each frame."
+    )
+    frames_parser.add_argument("--inputs", type=int, default=500, help="Scripted key presses and mouse moves.")
+    frames_parser.add_argument("--size", type=parse_size, default=(80, 43), help="Map size, as WIDTHxHEIGHT.")
+    frames_parser.add_argument("--seed", type=int, default=0, help="Run seed the floors are derived from.")
+    frames_parser.add_argument("--dump", help="Save the last frame to this .npy file, as codepoints and colors.")
+    frames_parser.add_argument("--floor-cache", help=FLOOR_CACHE_HELP)
+    frames_parser.set_defaults(run=run_frames)
+
+    chase_parser = subparsers.add_parser(
+        "chase", help="Time a turn of monsters chasing the player, with a path each against the shared distance map."
+    )
+    chase_parser.add_argument("--monsters", nargs="+", type=int, default=[5, 50, 500], help="Monsters per run.")
+    chase_parser.add_argument("--turns", type=int, default=50, help="Turns to time per run.")
+    chase_parser.add_argument("--seed", type=int, default=0, help="Seed for the arena and where the monsters start.")
+    chase_parser.set_defaults(run=run_chase)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,17 @@
-import random
 import copy
 
+import numpy as np  # type: ignore
+
 
 class CellularAutomata:
-    def __init__(self, chance_to_come_alive=0.45, birth_limit=2, death_limit=3, width=2, height=2):
+    def __init__(self, chance_to_come_alive=0.45, birth_limit=2, death_limit=3, width=2, height=2, rng=None):
         self.chance_to_come_alive = chance_to_come_alive
         self.birth_limit = birth_limit
         self.death_limit = death_limit
         self.map_width = width
         self.map_height = height
+        # pass a seeded numpy Generator to make the map reproducible.
+        self.rng = rng if rng is not None else np.random.default_rng()
 
         self.map = []
 
@@ -16,7 +19,7 @@ class CellularAutomata:
         for x in range(self.map_width):
             row = []
             for y in range(self.map_height):
-                if random.random() < self.chance_to_come_alive:
+                if self.rng.random() < self.chance_to_come_alive:
                     row.append(True)
                 else:
                     row.append(False)
@@ -0,0 +1,267 @@
+"""Sparse 2D array storage for map layers, so the untouched parts of a very large map cost no memory."""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+
+class ChunkedArray:
+    """
+    A 2D array stored as square chunks of chunk_size tiles, which are only allocated the first time a value other
+    than fill_value is written into them.  Everything else reads as fill_value.
+
+    It indexes like the dense arrays it replaces:
+
+    - `array[x, y]` reads or writes one element.
+    - `array[x0:x1, y0:y1]` and `array[...]` read a dense copy of the window, or write a value or array into it.
+      Callers that only need part of the map, such as the field of view, pathfinding and the camera, ask for just
+      that window.
+    - `array[xs, ys]` reads or writes the elements at integer arrays of coordinates.
+    - `array[mask]` writes through a boolean mask over the whole map.
+    - `array["field"]` and `np.asarray(array)` build a dense copy of the whole map, for map generation and other
+      one-off work.
+
+    Writing fill_value over the whole of a chunk frees it again.  version counts the writes, so anything worked out
+    from the array can tell when it is out of date.
+    """
+
+    def __init__(self, shape: Tuple[int, int], dtype: Any, fill_value: Any, chunk_size: int = 32):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.fill_value = np.asarray(fill_value, dtype=self.dtype)
+        self.chunk_size = chunk_size
+        self.chunks: Dict[Tuple[int, int], np.ndarray] = {}
+        self.version = 0
+
+        # values are compared with fill_value as raw bytes, which is much quicker than comparing structured records.
+        self._raw_dtype = np.dtype((np.void, self.dtype.itemsize))
+        self._raw_fill_value = self.fill_value.view(self._raw_dtype)
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("version", 0)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, fill_value: Any, chunk_size: int = 32) -> ChunkedArray:
+        chunked = cls(array.shape, array.dtype, fill_value, chunk_size)
+        chunked[...] = array
+        return chunked
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the allocated chunks."""
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    def allocated_window(self) -> Optional[Tuple[slice, slice]]:
+        """Return the smallest window covering every allocated chunk, or None if none are allocated."""
+        if not self.chunks:
+            return None
+        chunk_xs = [chunk_x for chunk_x, _ in self.chunks]
+        chunk_ys = [chunk_y for _, chunk_y in self.chunks]
+        size = self.chunk_size
+        return (
+            slice(min(chunk_xs) * size, min((max(chunk_xs) + 1) * size, self.shape[0])),
+            slice(min(chunk_ys) * size, min((max(chunk_ys) + 1) * size, self.shape[1])),
+        )
+
+    def to_array(self) -> np.ndarray:
+        """Return a dense copy of the whole map."""
+        return self[...]
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        array = self.to_array()
+        return array if dtype is None else array.astype(dtype)
+
+    def _is_fill_value(self, values: np.ndarray) -> bool:
+        """Return True if every element of values is fill_value."""
+        return bool((values.view(self._raw_dtype) == self._raw_fill_value).all())
+
+    def _window(self, key: Any) -> Tuple[int, int, int, int, bool, bool]:
+        """Return x0, y0, x1, y1 of an index, and whether the x or y axis was indexed with a single integer."""
+        if key is Ellipsis:
+            key = (slice(None), slice(None))
+        bounds = []
+        for index, size in zip(key, self.shape):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(size)
+                if step != 1:
+                    raise IndexError("ChunkedArray only supports slices with a step of 1.")
+                bounds.append((start, max(start, stop), False))
+            else:
+                index = int(index)
+                if not 0 <= index < size:
+                    raise IndexError(f"index {index} is out of bounds for an axis of size {size}")
+                bounds.append((index, index + 1, True))
+        (x0, x1, x_single), (y0, y1, y_single) = bounds
+        return x0, y0, x1, y1, x_single, y_single
+
+    def _chunks_in(self, x0: int, y0: int, x1: int, y1: int) -> Iterator[Tuple[Tuple[int, int], slice, slice]]:
+        """
+        Yield each chunk overlapping the window, with the part of the window it covers, as slices of the whole map.
+        """
+        size = self.chunk_size
+        for chunk_x in range(x0 // size, (x1 - 1) // size + 1):
+            for chunk_y in range(y0 // size, (y1 - 1) // size + 1):
+                yield (
+                    (chunk_x, chunk_y),
+                    slice(max(x0, chunk_x * size), min(x1, (chunk_x + 1) * size)),
+                    slice(max(y0, chunk_y * size), min(y1, (chunk_y + 1) * size)),
+                )
+
+    def _new_chunk(self, chunk_x: int, chunk_y: int) -> np.ndarray:
+        size = self.chunk_size
+        width = min(size, self.shape[0] - chunk_x * size)
+        height = min(size, self.shape[1] - chunk_y * size)
+        return np.full((width, height), self.fill_value, dtype=self.dtype, order="F")
+
+    @staticmethod
+    def _is_points(key: Any) -> bool:
+        return isinstance(key, tuple) and all(isinstance(index, np.ndarray) for index in key)
+
+    def _points_by_chunk(
+            self, xs: np.ndarray, ys: np.ndarray
+    ) -> Iterator[Tuple[Tuple[int, int], np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield each chunk holding some of the points, with the indices of those points and their chunk offsets."""
+        if ((xs < 0) | (xs >= self.shape[0]) | (ys < 0) | (ys >= self.shape[1])).any():
+            raise IndexError("point index is out of bounds")
+        chunk_xs, chunk_ys = xs // self.chunk_size, ys // self.chunk_size
+        for chunk_x, chunk_y in set(zip(chunk_xs.tolist(), chunk_ys.tolist())):
+            indices = np.flatnonzero((chunk_xs == chunk_x) & (chunk_ys == chunk_y))
+            yield (
+                (chunk_x, chunk_y),
+                indices,
+                xs[indices] - chunk_x * self.chunk_size,
+                ys[indices] - chunk_y * self.chunk_size,
+            )
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            return self.to_array()[key]
+        if isinstance(key, np.ndarray):
+            return self.to_array()[key]
+        if self._is_points(key):
+            xs, ys = np.broadcast_arrays(*key)
+            values = np.full(xs.shape, self.fill_value, dtype=self.dtype)
+            for chunk_key, indices, local_xs, local_ys in self._points_by_chunk(xs.ravel(), ys.ravel()):
+                chunk = self.chunks.get(chunk_key)
+                if chunk is not None:
+                    values.flat[indices] = chunk[local_xs, local_ys]
+            return values
+
+        x0, y0, x1, y1, x_single, y_single = self._window(key)
+        if x_single and y_single:
+            chunk = self.chunks.get((x0 // self.chunk_size, y0 // self.chunk_size))
+            if chunk is None:
+                return self.fill_value[()]
+            return chunk[x0 % self.chunk_size, y0 % self.chunk_size]
+
+        window = np.full((x1 - x0, y1 - y0), self.fill_value, dtype=self.dtype, order="F")
+        if x1 > x0 and y1 > y0:
+            size = self.chunk_size
+            for (chunk_x, chunk_y), x_slice, y_slice in self._chunks_in(x0, y0, x1, y1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is not None:
+                    window[x_slice.start - x0:x_slice.stop - x0, y_slice.start - y0:y_slice.stop - y0] = chunk[
+                        x_slice.start - chunk_x * size:x_slice.stop - chunk_x * size,
+                        y_slice.start - chunk_y * size:y_slice.stop - chunk_y * size,
+                    ]
+
+        if x_single:
+            return window[0, :]
+        if y_single:
+            return window[:, 0]
+        return window
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.version += 1
+        if isinstance(key, np.ndarray) and key.dtype == bool:
+            self._set_masked(key, value)
+            return
+        if self._is_points(key):
+            self._set_points(*key, value)
+            return
+
+        x0, y0, x1, y1, x_single, y_single = self._window(key)
+        if x1 <= x0 or y1 <= y0:
+            return
+        value = np.asarray(value, dtype=self.dtype)
+        if x_single and y_single:
+            chunk = self.chunks.get((x0 // self.chunk_size, y0 // self.chunk_size))
+            if chunk is None:
+                if self._is_fill_value(value):
+                    return
+                chunk = self.chunks[x0 // self.chunk_size, y0 // self.chunk_size] = self._new_chunk(
+                    x0 // self.chunk_size, y0 // self.chunk_size
+                )
+            chunk[x0 % self.chunk_size, y0 % self.chunk_size] = value
+            return
+        if value.ndim == 0:
+            self._fill_window(x0, y0, x1, y1, value)
+            return
+
+        # put the integer indexed axes back, so value lines up with the window.
+        if x_single:
+            value = value[np.newaxis]
+        if y_single:
+            value = value[..., np.newaxis]
+        value = np.broadcast_to(value, (x1 - x0, y1 - y0))
+
+        size = self.chunk_size
+        for (chunk_x, chunk_y), x_slice, y_slice in self._chunks_in(x0, y0, x1, y1):
+            part = value[x_slice.start - x0:x_slice.stop - x0, y_slice.start - y0:y_slice.stop - y0]
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None:
+                if self._is_fill_value(part):
+                    continue  # Still all fill_value, so there is nothing to allocate.
+                chunk = self.chunks[chunk_x, chunk_y] = self._new_chunk(chunk_x, chunk_y)
+            chunk[
+                x_slice.start - chunk_x * size:x_slice.stop - chunk_x * size,
+                y_slice.start - chunk_y * size:y_slice.stop - chunk_y * size,
+            ] = part
+
+    def _fill_window(self, x0: int, y0: int, x1: int, y1: int, value: np.ndarray) -> None:
+        is_fill_value = self._is_fill_value(value)
+        size = self.chunk_size
+        for (chunk_x, chunk_y), x_slice, y_slice in self._chunks_in(x0, y0, x1, y1):
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None:
+                if is_fill_value:
+                    continue
+                chunk = self.chunks[chunk_x, chunk_y] = self._new_chunk(chunk_x, chunk_y)
+            local = (
+                slice(x_slice.start - chunk_x * size, x_slice.stop - chunk_x * size),
+                slice(y_slice.start - chunk_y * size, y_slice.stop - chunk_y * size),
+            )
+            if is_fill_value and local[0].stop - local[0].start == chunk.shape[0] \
+                    and local[1].stop - local[1].start == chunk.shape[1]:
+                del self.chunks[chunk_x, chunk_y]  # Back to all fill_value.
+                continue
+            chunk[local] = value
+
+    def _set_points(self, xs: np.ndarray, ys: np.ndarray, value: Any) -> None:
+        xs, ys, values = np.broadcast_arrays(xs, ys, np.asarray(value, dtype=self.dtype))
+        xs, ys, values = xs.ravel(), ys.ravel(), values.ravel()
+        for chunk_key, indices, local_xs, local_ys in self._points_by_chunk(xs, ys):
+            chunk = self.chunks.get(chunk_key)
+            if chunk is None:
+                if self._is_fill_value(values[indices]):
+                    continue
+                chunk = self.chunks[chunk_key] = self._new_chunk(*chunk_key)
+            chunk[local_xs, local_ys] = values[indices]
+
+    def _set_masked(self, mask: np.ndarray, value: Any) -> None:
+        value = np.asarray(value, dtype=self.dtype)
+        for (chunk_x, chunk_y), x_slice, y_slice in self._chunks_in(0, 0, *self.shape):
+            chunk_mask = mask[x_slice, y_slice]
+            if not chunk_mask.any():
+                continue
+            part = value if value.ndim == 0 else value[x_slice, y_slice][chunk_mask]
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None:
+                if self._is_fill_value(part):
+                    continue
+                chunk = self.chunks[chunk_x, chunk_y] = self._new_chunk(chunk_x, chunk_y)
+            chunk[chunk_mask] = part
+            if self._is_fill_value(chunk):
+                del self.chunks[chunk_x, chunk_y]
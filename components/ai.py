@@ -7,11 +7,23 @@ import numpy as np  # type: ignore
 import tcod
 
 import color
+from distance_map import DIRECTIONS, downhill_step, goal_graph, shifted
 import dynamic_messages
 from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction, PickupAction
+from entity import Item
 
 if TYPE_CHECKING:
-    from entity import Actor, Item
+    from entity import Actor
+
+# how far the target may be from where a path was planned to before the path is planned again.
+PATH_TOLERANCE = 2
+# how many times in a row a blocked path is patched before it is planned again from scratch.
+MAX_PATH_REPAIRS = 3
+# how far around itself a monster looks for a way around whatever is blocking its path.
+REPAIR_RADIUS = 4
+# how much further away the edge of the explored area is made to look to autoexplore than items and enemies, in
+# path cost, where a step costs 2, or 3 diagonally.
+FRONTIER_PRIORITY = 20
 
 
 class BaseAI(Action):
@@ -19,34 +31,37 @@ class BaseAI(Action):
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+    def get_path_to(
+            self, dest_x: int, dest_y: int, region: Optional[Tuple[slice, slice]] = None
+    ) -> List[Tuple[int, int]]:
         """Compute and return a path to the target position.
 
+        If region is given, as a pair of slices, the path has to stay inside it.
         If there is no valid path then returns an empty list.
         """
-        # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.gamemap.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
+        if region is None:
+            region = (slice(0, self.entity.gamemap.width), slice(0, self.entity.gamemap.height))
+        x_slice, y_slice = region
+        origin_x, origin_y = x_slice.start, y_slice.start
+        if not (
+                x_slice.start <= self.entity.x < x_slice.stop and y_slice.start <= self.entity.y < y_slice.stop
+                and x_slice.start <= dest_x < x_slice.stop and y_slice.start <= dest_y < y_slice.stop
+        ):
+            return []
+
+        cost = self.entity.gamemap.movement_cost(region)
 
         # Create a graph from the cost array and pass that graph to a new pathfinder.
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
         pathfinder = tcod.path.Pathfinder(graph)
 
-        pathfinder.add_root((self.entity.x, self.entity.y))  # Start position.
+        pathfinder.add_root((self.entity.x - origin_x, self.entity.y - origin_y))  # Start position.
 
         # Compute the path to the destination and remove the starting point.
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
+        path: List[List[int]] = pathfinder.path_to((dest_x - origin_x, dest_y - origin_y))[1:].tolist()
 
         # Convert from List[List[int]] to List[Tuple[int, int]].
-        return [(index[0], index[1]) for index in path]
+        return [(index[0] + origin_x, index[1] + origin_y) for index in path]
 
 
 class ConfusedEnemy(BaseAI):
@@ -123,9 +138,100 @@ class PoisonedEnemy(BaseAI):
 
 
 class HostileEnemy(BaseAI):
+    """
+    Chases the player down the shared distance map while it can see them, and heads for where it last saw them
+    once it can't.
+
+    The path there is kept between turns, along with the target and GameMap.tiles_version it was planned for.  It
+    is reused as long as the tiles haven't changed, a new target is within PATH_TOLERANCE of the old one, and its
+    next step is free.  A blocked step is patched with a short detour back onto the path, up to MAX_PATH_REPAIRS
+    times in a row, before the path is planned again from scratch.
+    """
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
+        # where the player was last seen, until there is a path there to follow.
+        self.last_seen: Optional[Tuple[int, int]] = None
+        # the target and tiles_version self.path was planned for, and how many times in a row it was patched.
+        self.path_key: Optional[Tuple[Tuple[int, int], int]] = None
+        self.path_repairs = 0
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("last_seen", None)
+        if "path_key" not in state:
+            self.path = []  # Planned before paths were kept with their target, so it can't be checked.
+        self.__dict__.setdefault("path_key", None)
+        self.__dict__.setdefault("path_repairs", 0)
+
+    def plan_path(self, target_x: int, target_y: int) -> None:
+        """Make self.path lead to the target, keeping the path already planned if it still does."""
+        tiles_version = self.engine.game_map.tiles_version
+        if self.path and self.path_key is not None:
+            (planned_x, planned_y), planned_tiles_version = self.path_key
+            if planned_tiles_version == tiles_version \
+                    and max(abs(planned_x - target_x), abs(planned_y - target_y)) <= PATH_TOLERANCE:
+                return
+
+        self.path = self.get_path_to(target_x, target_y, self.engine.active_region())
+        self.path_key = (target_x, target_y), tiles_version
+        self.path_repairs = 0
+        self.engine.path_replans += 1
+
+    def is_next_to(self, x: int, y: int) -> bool:
+        return max(abs(x - self.entity.x), abs(y - self.entity.y)) == 1
+
+    def is_free(self, x: int, y: int) -> bool:
+        """Return True if x, y is a step away and nothing stops this entity stepping onto it."""
+        game_map = self.engine.game_map
+        return (
+                self.is_next_to(x, y)
+                and game_map.in_bounds(x, y)
+                and bool(game_map.walkable((x, y)))
+                and not game_map.blocking_occupancy[x, y]
+        )
+
+    def repair_path(self) -> bool:
+        """
+        Replace the start of self.path with a detour to the first free tile along it, within REPAIR_RADIUS.  Return
+        False if there isn't one.
+        """
+        game_map = self.engine.game_map
+        region = game_map.region_around(self.entity.x, self.entity.y, REPAIR_RADIUS, REPAIR_RADIUS)
+        for index, (x, y) in enumerate(self.path):
+            if max(abs(x - self.entity.x), abs(y - self.entity.y)) > REPAIR_RADIUS:
+                break
+            if game_map.blocking_occupancy[x, y]:
+                continue
+            detour = self.get_path_to(x, y, region)
+            if detour and self.is_free(*detour[0]):
+                self.path = detour + self.path[index + 1:]
+                return True
+        return False
+
+    def next_step(self) -> Optional[Tuple[int, int]]:
+        """
+        Pop and return the next step of self.path, patching or replanning the path first if it is blocked or no
+        longer starts next to this entity.
+        """
+        if self.is_free(*self.path[0]):
+            self.path_repairs = 0
+            self.engine.path_steps_reused += 1
+        elif len(self.path) == 1 and self.is_next_to(*self.path[0]):
+            # whatever is standing on the end of the path got there first, so there is nowhere left to go.
+            self.path = []
+            return None
+        elif self.path_repairs < MAX_PATH_REPAIRS and self.repair_path():
+            self.path_repairs += 1
+            self.engine.path_repairs += 1
+        else:
+            (target_x, target_y), _ = self.path_key
+            self.path = []
+            self.plan_path(target_x, target_y)
+            if not self.path:
+                return None
+        return self.path.pop(0)
 
     def perform(self) -> None:
         target = self.engine.player
@@ -137,22 +243,36 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            # step along the distance map every chasing monster shares this turn, rather than finding a path of
+            # its own.
+            self.last_seen = target.x, target.y
+            step = self.engine.player_distance_map.step_toward_player(self.engine, self.entity)
+            if step is None:
+                return WaitAction(self.entity).perform()
+            return MovementAction(self.entity, step[0] - self.entity.x, step[1] - self.entity.y).perform()
+        elif self.last_seen is not None:
+            # lost sight of the player, so head for where they were last seen.
+            self.plan_path(*self.last_seen)
+            self.last_seen = None
 
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity, dest_x - self.entity.x, dest_y - self.entity.y,
-            ).perform()
+            step = self.next_step()
+            if step is not None:
+                return MovementAction(self.entity, step[0] - self.entity.x, step[1] - self.entity.y).perform()
 
         return WaitAction(self.entity).perform()
 
 
 class AutoExploring(BaseAI):
-    def __init__(self, entity: Actor):
-        super().__init__(entity)
-        self.flood_fill = None
-        self.path: List[Tuple[int, int]] = []
+    """
+    Walks the player towards whichever is nearest of the edge of the explored area, the items they have seen and the
+    enemies they can see, fighting enemies and picking up items as it reaches them, until there is nowhere left to
+    go.
+
+    Each step is one Dijkstra pass rooted at all of those goals at once, see distance_map.  The frontier goals start
+    FRONTIER_PRIORITY further away than they are, so the player heads for an item or enemy first unless the edge of the
+    map is a good deal closer.
+    """
 
     def perform(self) -> None:
         if self.engine.player.fighter.hp <= 25 and self.are_enemies_on_map():
@@ -165,36 +285,22 @@ class AutoExploring(BaseAI):
             self.engine.player.ai = HostileEnemy(self.engine.player)
             return False
 
-        closest_item = self.find_closest_item()
-        if closest_item is not None:
-            dx = closest_item.x - self.engine.player.x
-            dy = closest_item.y - self.engine.player.y
-            distance = max(abs(dx), abs(dy))  # Chebyshev distance.
-
-            if self.engine.game_map.visible[closest_item.x, closest_item.y]:
-                if distance == 0:
-                    self.engine.message_log.add_message(dynamic_messages.entity_state_grammer.flatten('#item_found#'), color.green)
-                    PickupAction(self.engine.player).perform()
-                    return True
-
-            self.path = self.get_path_to(closest_item.x, closest_item.y)
-
-        for enemy in set(self.engine.game_map.actors) - {self.engine.player}:
-            if enemy.is_alive:
-                dx = enemy.x - self.engine.player.x
-                dy = enemy.y - self.engine.player.y
-                distance = max(abs(dx), abs(dy))  # Chebyshev distance.
-                if self.engine.game_map.visible[enemy.x, enemy.y]:
-                    if distance <= 1:
-                        MeleeAction(self.engine.player, dx, dy).perform()
-                        return True
-                self.path = self.get_path_to(enemy.x, enemy.y)
+        player = self.engine.player
+        game_map = self.engine.game_map
 
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            MovementAction(
-                self.engine.player, dest_x - self.engine.player.x, dest_y - self.engine.player.y,
-            ).perform()
+        for enemy in game_map.get_actors_in_region(game_map.region_around(player.x, player.y, 1, 1)):
+            if enemy is not player and game_map.visible[enemy.x, enemy.y]:
+                MeleeAction(player, enemy.x - player.x, enemy.y - player.y).perform()
+                return True
+
+        if any(isinstance(entity, Item) for entity in game_map.get_entities_at_location(player.x, player.y)):
+            self.engine.message_log.add_message(dynamic_messages.entity_state_grammer.flatten('#item_found#'), color.green)
+            PickupAction(player).perform()
+            return True
+
+        step = self.explore_step()
+        if step is not None:
+            BumpAction(player, *step).perform()
             self.engine.update_fov()
             return True
 
@@ -202,17 +308,40 @@ class AutoExploring(BaseAI):
         self.engine.player.ai = HostileEnemy(self.engine.player)
         return False
 
-    def find_closest_item(self) -> Optional[Item]:
-        closest_item = None
-        closest_distance = float("inf")
-        for item in self.engine.game_map.items:
-            dx = item.x - self.engine.player.x
-            dy = item.y - self.engine.player.y
-            distance = max(abs(dx), abs(dy))
-            if distance < closest_distance:
-                closest_item = item
-                closest_distance = distance
-        return closest_item
+    def explore_step(self) -> Optional[Tuple[int, int]]:
+        """Return the dx, dy of the player's next step towards the nearest goal, or None if none can be reached."""
+        player = self.engine.player
+        game_map = self.engine.game_map
+
+        # every goal is on a tile that has been explored, so the pass only has to cover those, and one tile past
+        # them to tell which of them are on the edge.
+        x_slice, y_slice = game_map.explored.allocated_window() or game_map.region_around(player.x, player.y, 0, 0)
+        region = (
+            slice(max(0, x_slice.start - 1), min(game_map.width, x_slice.stop + 1)),
+            slice(max(0, y_slice.start - 1), min(game_map.height, y_slice.stop + 1)),
+        )
+        origin_x, origin_y = region[0].start, region[1].start
+
+        explored = game_map.explored[region]
+        cost = game_map.movement_cost(region)
+        cost[~explored] = 0  # Only walk over tiles the player has seen.
+
+        # walkable explored tiles next to an unexplored one, apart from the one the player is about to see past.
+        unexplored = ~explored
+        frontier = (cost > 0) & np.logical_or.reduce([shifted(unexplored, dx, dy) for dx, dy in DIRECTIONS])
+        frontier[player.x - origin_x, player.y - origin_y] = False
+
+        pathfinder = tcod.path.Pathfinder(goal_graph(cost))
+        for x, y in np.argwhere(frontier).tolist():
+            pathfinder.add_root((x, y), FRONTIER_PRIORITY)
+        for item in game_map.items:
+            if game_map.explored[item.x, item.y]:
+                pathfinder.add_root((item.x - origin_x, item.y - origin_y))
+        for enemy in game_map.get_actors_in_region(region):
+            if enemy is not player and game_map.visible[enemy.x, enemy.y]:
+                pathfinder.add_root((enemy.x - origin_x, enemy.y - origin_y))
+
+        return downhill_step(pathfinder, cost, player.x - origin_x, player.y - origin_y)
 
     def are_enemies_on_map(self) -> bool:
         for actor in self.engine.game_map.actors:
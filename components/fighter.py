@@ -72,6 +72,7 @@ class Fighter(BaseComponent):
         self.parent.ai = None
         self.parent.name = f"{dynamic_messages.entity_state_grammer.flatten('#dead_enemy#')} {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
+        self.gamemap.update_entity(self.parent)
 
         self.engine.message_log.add_message(death_message, death_message_color)
         self.engine.player.level.add_xp(self.parent.level.xp_given)
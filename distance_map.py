@@ -0,0 +1,132 @@
+"""
+Dijkstra maps: the cost of the cheapest path from every tile to the nearest of some goals, found in one pass from
+the goals outwards, so anything walking towards those goals just steps downhill instead of finding a path of its own.
+"""
+from __future__ import annotations
+
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+# the cost tcod's pathfinding gives a cardinal and a diagonal step, which get_path_to uses too.
+CARDINAL_COST = 2
+DIAGONAL_COST = 3
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+def shifted(array: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Return array moved dx, dy tiles over, so each tile holds the value of the tile dx, dy before it, or 0."""
+    width, height = array.shape
+    result = np.zeros_like(array)
+    result[max(dx, 0):width + min(dx, 0), max(dy, 0):height + min(dy, 0)] = \
+        array[max(-dx, 0):width - max(dx, 0), max(-dy, 0):height - max(dy, 0)]
+    return result
+
+
+def goal_graph(cost: np.ndarray) -> tcod.path.CustomGraph:
+    """
+    Return a graph over cost, a movement_cost array, for a pass run from the goals outwards.
+
+    Whatever walks the distances goes the other way, towards the goals, so each step is charged the cost of the tile
+    it comes from, which is the tile the walker steps onto.  That keeps the distances the same as the cost of the
+    path BaseAI.get_path_to would find from the walker to the goal.
+    """
+    graph = tcod.path.CustomGraph(cost.shape)
+    for dx, dy in DIRECTIONS:
+        leaving_cost = shifted(cost, dx, dy)
+        leaving_cost[cost == 0] = 0
+        graph.add_edge((dx, dy), DIAGONAL_COST if dx and dy else CARDINAL_COST, cost=leaving_cost)
+    return graph
+
+
+def downhill_step(pathfinder: tcod.path.Pathfinder, cost: np.ndarray, x: int, y: int) -> Optional[Tuple[int, int]]:
+    """
+    Return the dx, dy of the next step of a cheapest path from x, y to the nearest goal of pathfinder, a pass over
+    goal_graph(cost), or None if no goal can be reached from x, y.
+    """
+    width, height = cost.shape
+    # once the pass has reached this tile, every tile closer to a goal than it has its final distance.
+    pathfinder.resolve((x, y))
+    distances = pathfinder.distance
+    here = int(distances[x, y])
+    if here == np.iinfo(distances.dtype).max:
+        return None
+
+    # the next step is onto the closer neighbor whose distance, plus the cost of stepping onto it, is smallest.
+    best_step, best_cost = None, 0
+    for dx, dy in DIRECTIONS:
+        next_x, next_y = x + dx, y + dy
+        if not (0 <= next_x < width and 0 <= next_y < height) or not cost[next_x, next_y]:
+            continue
+        distance = int(distances[next_x, next_y])
+        if distance >= here:
+            continue
+        total = distance + (DIAGONAL_COST if dx and dy else CARDINAL_COST) * int(cost[next_x, next_y])
+        if best_step is None or total < best_cost:
+            best_step, best_cost = (dx, dy), total
+    return best_step
+
+
+class PlayerDistanceMap:
+    """
+    The cost of the cheapest path from every tile in the active region to the player, using the same crowding cost
+    as BaseAI.get_path_to.
+
+    One Dijkstra pass rooted at the player is started each turn, the first time a monster asks for it.  Every
+    monster chasing the player that turn then steps downhill on it, so chasing costs one pass a turn however many
+    monsters there are.  The pass only spreads as far as the furthest monster that has asked so far.
+    """
+
+    def __init__(self) -> None:
+        # the turn, map, player position and active region the pass was started for.
+        self.key: Optional[Tuple[int, int, int, int, Tuple[slice, slice]]] = None
+        self.region: Tuple[slice, slice] = (slice(0, 0), slice(0, 0))
+        self.cost = np.zeros((0, 0), dtype=np.int8)
+        self._pathfinder: Optional[tcod.path.Pathfinder] = None
+        self.computes = 0
+
+    def __getstate__(self) -> dict:
+        # the pass is only good for the turn it was started in, so it isn't saved.
+        state = self.__dict__.copy()
+        state["key"] = None
+        state["cost"] = np.zeros((0, 0), dtype=np.int8)
+        state["_pathfinder"] = None
+        return state
+
+    def update(self, engine: Engine) -> None:
+        """Start this turn's pass, unless it already has been."""
+        player = engine.player
+        region = engine.active_region()
+        key = engine.turns, id(engine.game_map), player.x, player.y, region
+        if key == self.key:
+            return
+
+        x_slice, y_slice = region
+        self.cost = engine.game_map.movement_cost(region)
+        self._pathfinder = tcod.path.Pathfinder(goal_graph(self.cost))
+        self._pathfinder.add_root((player.x - x_slice.start, player.y - y_slice.start))
+        self.region = region
+        self.key = key
+        self.computes += 1
+
+    def step_toward_player(self, engine: Engine, actor: Actor) -> Optional[Tuple[int, int]]:
+        """
+        Return the tile actor should step onto to follow a cheapest path to the player, or None if the player can't
+        be reached from where it stands.
+        """
+        self.update(engine)
+        x_slice, y_slice = self.region
+        x, y = actor.x - x_slice.start, actor.y - y_slice.start
+        width, height = self.cost.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        step = downhill_step(self._pathfinder, self.cost, x, y)
+        if step is None:
+            return None
+        return actor.x + step[0], actor.y + step[1]
@@ -3,14 +3,16 @@ from __future__ import annotations
 import lzma
 import pickle
 import random
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 
 from tcod.console import Console
 from tcod.map import compute_fov
 
-import exceptions
 from message_log import MessageLog
+from distance_map import PlayerDistanceMap
 import render_functions
+from turn_scheduler import TurnScheduler
+from viewport import Viewport
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -21,83 +23,157 @@ class Engine:
     game_map: GameMap
     game_world: GameWorld
 
-    def __init__(self, player: Actor, final_boss: Actor):
+    def __init__(
+            self, player: Actor, final_boss: Actor, seed: Optional[int] = None, viewport: Optional[Viewport] = None
+    ):
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
         self.final_boss = final_boss
 
-        self.seed = "None"
+        # the run seed, every floor's map and spawns are derived from it and the floor number.
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
         self.procgen_types = ["Rectangular Room", "Cellular Automata", "Simplex Noise"]
         self.procgen_type = random.choice(self.procgen_types)
 
+        self.viewport = viewport or Viewport()
+        self.turn_scheduler = TurnScheduler()
+        self.player_distance_map = PlayerDistanceMap()
+
+        # debug stats, see debug_summary.
+        self.turns = 0
+        self.fov_recomputes = 0
+        self.fov_cache_hits = 0
+        # steps monsters took along a path they had already planned, and how often one had to be patched or
+        # planned again, see HostileEnemy.
+        self.path_steps_reused = 0
+        self.path_repairs = 0
+        self.path_replans = 0
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if not isinstance(self.seed, int):
+            # saved before runs had a seed, when it was stored as the string "None".  a fresh seed lets the save
+            # still generate the floors below it.
+            self.seed = random.randrange(2 ** 32)
+        self.__dict__.setdefault("viewport", Viewport())
+        self.__dict__.setdefault("turn_scheduler", TurnScheduler())
+        self.__dict__.setdefault("player_distance_map", PlayerDistanceMap())
+        self.__dict__.setdefault("turns", 0)
+        self.__dict__.setdefault("fov_recomputes", 0)
+        self.__dict__.setdefault("fov_cache_hits", 0)
+        self.__dict__.setdefault("path_steps_reused", 0)
+        self.__dict__.setdefault("path_repairs", 0)
+        self.__dict__.setdefault("path_replans", 0)
+
+    def active_region(self) -> Tuple[slice, slice]:
+        """Return the part of the map around the player that enemies act in, see Viewport."""
+        game_map = self.game_map
+        x_start, y_start, x_end, y_end = game_map.camera_window()
+        margin = self.viewport.active_margin
+        # the camera stops at the edges of the map rather than staying centered on the player, so the region is
+        # grown from where the camera actually is.
+        return (
+            slice(max(0, x_start - margin), min(game_map.width, x_end + margin)),
+            slice(max(0, y_start - margin), min(game_map.height, y_end + margin)),
+        )
+
     def handle_enemy_turns(self) -> None:
         # if isinstance(self.player.ai, ai.AutoExploring):
         #     self.player.ai.perform()
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
-                    entity.ai.perform()
-                except exceptions.Impossible:
-                    pass  # Ignore impossible action exceptions from AI.
+        self.turns += 1
+        self.turn_scheduler.run_turn(self)
 
     def handle_autoexplore_turns(self) -> None:
         # if isinstance(self.player.ai, ai.AutoExploring):
         valid_action_performed = self.player.ai.perform()
 
         if valid_action_performed:
-            for entity in set(self.game_map.actors) - {self.player}:
-                if entity.ai:
-                    try:
-                        entity.ai.perform()
-                    except exceptions.Impossible:
-                        pass  # Ignore impossible action exceptions from AI.
+            self.turns += 1
+            self.turn_scheduler.run_turn(self)
         return valid_action_performed
 
     def update_fov(self) -> None:
         """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
+        game_map = self.game_map
+        radius = 8
+
+        # the field of view only changes when the player moves or the map's tiles change, and what is
+        # explored already includes everything it shows, so otherwise there is nothing to do.
+        fov_key = self.player.x, self.player.y, radius, game_map.tiles_version
+        if fov_key == game_map.fov_key:
+            self.fov_cache_hits += 1
+            return
+        self.fov_recomputes += 1
+        game_map.fov_key = fov_key
+
+        # nothing past the radius can be seen, so only the square around the player is computed, and only the
+        # square of the last field of view has to be cleared.
+        game_map.visible[game_map.fov_window] = False
+        fov_window = game_map.region_around(self.player.x, self.player.y, radius, radius)
+        x_slice, y_slice = fov_window
+        game_map.visible[fov_window] = compute_fov(
+            game_map.transparent(fov_window),
+            (self.player.x - x_slice.start, self.player.y - y_slice.start),
+            radius=radius,
         )
+        game_map.fov_window = fov_window
+        game_map.visibility_version += 1
         # make whole map visible for testing
         # self.game_map.visible[:] = True
         # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[fov_window] |= game_map.visible[fov_window]
+
+    def debug_summary(self) -> str:
+        fov_per_turn = self.fov_recomputes / self.turns if self.turns else 0.0
+        path_steps = self.path_steps_reused + self.path_repairs + self.path_replans
+        path_hit_rate = self.path_steps_reused / path_steps if path_steps else 0.0
+        floor_cache = self.game_world.floor_cache
+        return (
+            f"{self.turns} turns, {self.fov_recomputes} FOV recomputes ({fov_per_turn:.2f} per turn), "
+            f"{self.fov_cache_hits} reused; {self.turn_scheduler.summary()}; "
+            f"{self.player_distance_map.computes} player distance maps; "
+            f"paths {self.path_steps_reused} steps reused, {self.path_repairs} repaired, "
+            f"{self.path_replans} replanned ({path_hit_rate:.0%} reused)"
+        ) + (f"; {floor_cache.summary()}" if floor_cache is not None else "")
 
     def render(self, console: Console) -> None:
         self.game_map.render(console)
 
-        self.message_log.render(console=console, x=33, y=45, width=40, height=5)
+        log_x, log_y, log_width, log_height = self.viewport.message_log_area
+        self.message_log.render(console=console, x=log_x, y=log_y, width=log_width, height=log_height)
 
         render_functions.render_bar(
             console=console,
             current_value=self.player.fighter.hp,
             maximum_value=self.player.fighter.max_hp,
             total_width=20,
+            location=self.viewport.health_bar_location,
         )
 
         render_functions.render_dungeon_level(
             console=console,
             dungeon_level=self.game_world.current_floor,
-            location=(0, 47),
+            location=self.viewport.dungeon_level_location,
         )
 
         render_functions.render_seed(
             console=console,
             seed_number=self.seed,
-            location=(0, 48)
+            location=self.viewport.seed_location
         )
 
         render_functions.render_procgen_type(
             console=console,
             procgen_type=self.procgen_type,
-            location=(0, 49)
+            location=self.viewport.procgen_type_location
         )
 
+        names_x, names_y = self.viewport.names_location
         render_functions.render_names_at_mouse_location(
-            console=console, x=21, y=44, engine=self
+            console=console, x=names_x, y=names_y, engine=self
         )
 
     def save_as(self, filename: str) -> None:
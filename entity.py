@@ -5,6 +5,7 @@ import math
 from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
 from render_order import RenderOrder
+from turn_scheduler import NORMAL_SPEED
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -25,6 +26,9 @@ class Entity:
     """
 
     parent: Union[GameMap, Inventory]
+    # the name of the entity_factories prototype this entity was spawned from, if any, which stays the same when the
+    # prototype's display name changes.
+    prototype_key: Optional[str] = None
 
     def __init__(
             self,
@@ -47,7 +51,7 @@ class Entity:
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
@@ -59,7 +63,7 @@ class Entity:
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
@@ -69,9 +73,11 @@ class Entity:
         if gamemap:
             if hasattr(self, "parent"):  # Possibly uninitialized.
                 if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+                    self.gamemap.remove_entity(self)
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        elif hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.update_entity(self)
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -83,6 +89,7 @@ class Entity:
         # Move the entity by a given amount
         self.x += dx
         self.y += dy
+        self.gamemap.update_entity(self)
 
 
 class Actor(Entity):
@@ -99,6 +106,7 @@ class Actor(Entity):
             fighter: Fighter,
             inventory: Inventory,
             level: Level,
+            speed: int = NORMAL_SPEED,
     ):
         super().__init__(
             x=x,
@@ -124,6 +132,13 @@ class Actor(Entity):
         self.level = level
         self.level.parent = self
 
+        # how often this actor acts, see TurnScheduler.
+        self.speed = speed
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("speed", NORMAL_SPEED)
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
@@ -264,4 +264,11 @@ elif player_class == 'Rogue':
 for item in starting_items:
     player.inventory.items[item.name] = [[item]]
     if item.equippable:
-        player.equipment.toggle_equip(item, add_message=False)
\ No newline at end of file
+        player.equipment.toggle_equip(item, add_message=False)
+
+# tag each prototype with its name in this module, which its copies keep, see Entity.prototype_key.  a prototype that
+# also has a later alias, such as item above, keeps the name it was defined with.
+for _key, _prototype in list(globals().items()):
+    if isinstance(_prototype, (Actor, Item)) and _prototype.prototype_key is None:
+        _prototype.prototype_key = _key
+del _key, _prototype
@@ -0,0 +1,158 @@
+"""On-disk cache of generated floors, so the same floor isn't generated twice across runs."""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import entity_factories
+from entity import Entity
+from game_map import GameMap
+import procgen
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from procgen import FloorSpec
+
+# bump whenever the layout of the cached files changes, so files in the old layout are no longer looked up.
+CACHE_VERSION = 2
+
+# set to a directory to cache the floors of every new game there, for repeated testing and benchmark runs.
+FLOOR_CACHE_ENV = "ROGUELIKE_FLOOR_CACHE"
+
+
+def floor_cache_from_environment() -> Optional[FloorCache]:
+    """Return a FloorCache in the directory FLOOR_CACHE_ENV names, or None if it isn't set."""
+    directory = os.environ.get(FLOOR_CACHE_ENV)
+    return FloorCache(directory) if directory else None
+
+
+def prototype_for(key: str) -> Entity:
+    """Return the entity_factories prototype with the given prototype_key, or raise KeyError if there is none."""
+    prototype = getattr(entity_factories, key, None)
+    if not isinstance(prototype, Entity) or prototype.prototype_key != key:
+        raise KeyError(key)
+    return prototype
+
+
+class FloorCache:
+    """
+    Stores generated floors as compressed .npz files, keyed by everything that goes into generating them.
+
+    Each file holds the tile ids, the stair and player start locations, and where each entity was spawned along with
+    the key of the entity_factories prototype it was copied from.  That is enough to rebuild the GameMap without
+    running procgen, and still finds the right prototypes if their display names change.  When the directory grows
+    past max_bytes, the least recently used floors are deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0  # Seconds of generation skipped by cache hits.
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def path_for(self, spec: FloorSpec) -> str:
+        key = repr((
+            spec.procgen_type, spec.seed, spec.floor, spec.map_width, spec.map_height, spec.max_rooms,
+            spec.room_min_size, spec.room_max_size, sorted(spec.placed_unique_names), procgen.GENERATOR_VERSION,
+            CACHE_VERSION,
+        ))
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".npz")
+
+    def __contains__(self, spec: FloorSpec) -> bool:
+        return os.path.exists(self.path_for(spec))
+
+    def load(self, spec: FloorSpec, engine: Engine) -> Optional[GameMap]:
+        """Rebuild the cached floor for spec with the engine's player on it, or return None on a miss."""
+        start = time.perf_counter()
+        path = self.path_for(spec)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                tile_ids = data["tile_ids"]
+                downstairs_location = tuple(data["downstairs_location"].tolist())
+                upstairs_location = tuple(data["upstairs_location"].tolist())
+                player_start = data["player_start"].tolist()
+                spawn_keys = data["spawn_keys"].tolist()
+                spawn_locations = data["spawn_locations"].tolist()
+                unique_names = data["unique_names"].tolist()
+                generation_time = float(data["generation_time"])
+            prototypes: List[Entity] = [prototype_for(key) for key in spawn_keys]
+        except (OSError, KeyError, ValueError):
+            # unreadable, or stored by a version of entity_factories that had other prototypes.
+            self.misses += 1
+            return None
+
+        game_map = GameMap(engine, spec.map_width, spec.map_height, entities=[engine.player])
+        game_map.tiles[...] = tile_ids
+        game_map.downstairs_location = downstairs_location
+        game_map.upstairs_location = upstairs_location
+        engine.player.place(*player_start, game_map)
+
+        for prototype, (x, y) in zip(prototypes, spawn_locations):
+            prototype.spawn(game_map, x, y)
+        game_map.unique_names = set(unique_names)
+
+        os.utime(path)  # Mark this floor as recently used.
+        self.hits += 1
+        self.time_saved += max(0.0, generation_time - (time.perf_counter() - start))
+        return game_map
+
+    def store(
+            self, spec: FloorSpec, game_map: GameMap, player_start: Tuple[int, int], generation_time: float
+    ) -> None:
+        """Save a freshly generated floor, then evict old floors if the cache is over its size limit."""
+        tile_ids = np.asarray(game_map.tiles)
+
+        spawns = [entity for entity in game_map.entities if entity is not game_map.engine.player]
+        if any(entity.prototype_key is None for entity in spawns):
+            return  # Something on the floor wasn't spawned from entity_factories, so it can't be rebuilt.
+
+        path = self.path_for(spec)
+        temporary_path = path + ".tmp.npz"
+        np.savez_compressed(
+            temporary_path,
+            tile_ids=tile_ids,
+            downstairs_location=np.array(game_map.downstairs_location),
+            upstairs_location=np.array(game_map.upstairs_location),
+            player_start=np.array(player_start),
+            spawn_keys=np.array([entity.prototype_key for entity in spawns], dtype=str),
+            spawn_locations=np.array([(entity.x, entity.y) for entity in spawns], dtype=np.int32).reshape(-1, 2),
+            unique_names=np.array(sorted(game_map.unique_names), dtype=str),
+            generation_time=np.float64(generation_time),
+        )
+        # write to the side first, so a reader never sees a half written floor.
+        os.replace(temporary_path, path)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used floors until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            os.remove(path)
+            total_size -= size
+
+    def summary(self) -> str:
+        return (
+            f"floor cache: {self.hits} hits, {self.misses} misses ({self.hit_ratio:.0%}), "
+            f"{self.time_saved:.2f}s saved"
+        )
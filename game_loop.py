@@ -0,0 +1,103 @@
+"""
+The steps of the game loop that don't need a window: drawing the active handler and passing it events.
+
+main runs them against a tcod window.  HeadlessGame runs them against an offscreen console, so servers, CI machines
+and benchmarks can drive the real render path with scripted input and read back what was drawn.
+"""
+from __future__ import annotations
+
+import time
+import traceback
+from typing import Iterable, List
+
+import numpy as np  # type: ignore
+import tcod
+
+import color
+import input_handlers
+
+
+def render_frame(handler: input_handlers.BaseEventHandler, console: tcod.Console) -> bool:
+    """Draw handler onto console if its frame is dirty, and return whether it was drawn."""
+    if not handler.frame_dirty:
+        return False
+    console.clear()
+    handler.on_render(console=console)
+    handler.frame_dirty = False
+    return True
+
+
+def handle_event(handler: input_handlers.BaseEventHandler, event: tcod.event.Event) -> input_handlers.BaseEventHandler:
+    """Pass event to handler and return the next active handler."""
+    try:
+        next_handler = handler.handle_events(event)
+    except Exception:  # Handle exceptions in game.
+        traceback.print_exc()  # Print error to stderr.
+        # Then print the error to the message log.
+        if isinstance(handler, input_handlers.EventHandler):
+            handler.engine.message_log.add_message(
+                traceback.format_exc(), color.error
+            )
+        handler.frame_dirty = True
+        return handler
+
+    if next_handler is not handler:
+        # a handler being returned to may have been drawn before, but the screen has changed.
+        next_handler.frame_dirty = True
+    return next_handler
+
+
+def export_frame(console: tcod.Console) -> np.ndarray:
+    """Return a copy of the console's cells, indexed [x, y], with their codepoint and fg and bg colors."""
+    return console.tiles_rgb.copy()
+
+
+def key_press(sym: tcod.event.KeySym, mod: tcod.event.Modifier = tcod.event.Modifier.NONE) -> tcod.event.KeyDown:
+    """Return the event for pressing the key sym, as a window would send it."""
+    return tcod.event.KeyDown(scancode=tcod.event.KeySym(sym).scancode, sym=sym, mod=mod)
+
+
+def mouse_motion(x: int, y: int) -> tcod.event.MouseMotion:
+    """Return the event for moving the mouse onto the console tile x, y."""
+    return tcod.event.MouseMotion(position=tcod.event.Point(x, y), tile=tcod.event.Point(x, y))
+
+
+class HeadlessGame:
+    """
+    Plays the game into an offscreen console instead of a window, a frame at a time.
+
+    Like main, it only draws when the active handler's frame is dirty, so the frames it renders and skips are the
+    ones a player would see.
+    """
+
+    def __init__(self, handler: input_handlers.BaseEventHandler, width: int = 80, height: int = 50):
+        self.handler = handler
+        self.console = tcod.Console(width, height, order="F")
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+
+    def render(self) -> bool:
+        """Draw a frame if anything changed since the last one, and return whether one was drawn."""
+        if render_frame(self.handler, self.console):
+            self.rendered_frames += 1
+            return True
+        self.skipped_frames += 1
+        return False
+
+    def send(self, event: tcod.event.Event) -> None:
+        """Pass event to the active handler, as if it came from the window."""
+        self.handler = handle_event(self.handler, event)
+
+    def play(self, events: Iterable[tcod.event.Event]) -> List[float]:
+        """Send each event and render the frame after it, and return how long each of those took in seconds."""
+        frame_times = []
+        for event in events:
+            start = time.perf_counter()
+            self.send(event)
+            self.render()
+            frame_times.append(time.perf_counter() - start)
+        return frame_times
+
+    def frame(self) -> np.ndarray:
+        """Return what was last drawn, see export_frame."""
+        return export_frame(self.console)
@@ -1,17 +1,54 @@
 from __future__ import annotations
 
-import random
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import time
+import traceback
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
 from tcod.console import Console
 
+from chunked_array import ChunkedArray
 from entity import Actor, Item
+from render_order import RenderOrder
 import tile_types
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from floor_cache import FloorCache
+    from procgen import FloorSpec
+
+# worker process that builds floors ahead of the player, created the first time it is needed.
+_floor_pool: Optional[ProcessPoolExecutor] = None
+
+
+def floor_pool() -> ProcessPoolExecutor:
+    global _floor_pool
+    if _floor_pool is None:
+        # spawn rather than fork, so the worker doesn't inherit the open tcod window.
+        _floor_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _floor_pool
+
+
+def reset_floor_pool() -> None:
+    """
+    Stop the worker straight away, dropping any floor it is building.  A new one is started the next time it is needed.
+
+    Call this before quitting while floors may be building.  Otherwise the interpreter waits at exit for the worker
+    to finish the floor it is on, which can take seconds on large maps.
+    """
+    global _floor_pool
+    if _floor_pool is None:
+        return
+    pool, _floor_pool = _floor_pool, None
+    # ProcessPoolExecutor can't cancel a job that has started, so its processes are terminated instead.
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
 
 
 class GameMap:
@@ -20,146 +57,333 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
-
-        self.visible = np.full(
-            (width, height), fill_value=False, order="F"
+        self.entities = set()
+        # ids into tile_types.palette.  untouched parts of the map read as solid wall without taking any memory.
+        self.tiles = ChunkedArray((width, height), np.uint8, tile_types.wall)
+
+        # position index over entities, kept up to date by add_entity, remove_entity and update_entity.
+        self.entities_by_location: Dict[Tuple[int, int], List[Entity]] = {}
+        # how many movement blocking entities stand on each tile.
+        self.blocking_occupancy = ChunkedArray((width, height), np.int16, 0)
+        # how many entities of each render order stand on each tile, so drawing can find them a layer at a time.
+        self.render_layers = {
+            render_order: ChunkedArray((width, height), np.int16, 0) for render_order in RenderOrder
+        }
+        # living actors, corpses and items, kept apart so they can be looked at without filtering entities.
+        self._live_actors: Set[Actor] = set()
+        self._corpses: Set[Actor] = set()
+        self._items: Set[Item] = set()
+        # where each entity was indexed, whether it was counted as blocking there, which collection it is in, and
+        # which render layer it was counted in.
+        self._indexed_entities: Dict[Entity, Tuple[Tuple[int, int], bool, Optional[Set], RenderOrder]] = {}
+        self._entity_index_stale = False
+        # bumped whenever an entity is indexed or unindexed, and whenever the field of view is recomputed, so
+        # anything worked out from the entities or what the player can see can tell when it is out of date.
+        self.entity_version = 0
+        self.visibility_version = 0
+        # the hover text last shown by render_names_at_mouse_location, and the mouse tile and versions it is for.
+        self.names_at_mouse_cache: Tuple[Optional[Tuple[int, int, int, int]], str] = (None, "")
+        for entity in entities:
+            self.add_entity(entity)
+
+        self.visible = ChunkedArray(
+            (width, height), bool, fill_value=False
         )  # Tiles the player can currently see
-        self.explored = np.full(
-            (width, height), fill_value=False, order="F"
+        self.explored = ChunkedArray(
+            (width, height), bool, fill_value=False
         )  # Tiles the player has seen before
 
         # for placing stairs locations
         self.downstairs_location = (0, 0)
         self.upstairs_location = (0, 0)
 
+        # how many maps the generator had to throw away before one had enough accessible tiles, plus one.
+        self.generation_attempts = 1
+        # names of the unique entities the generator placed here, see GameWorld.placed_unique_names.
+        self.unique_names: Set[str] = set()
+
         # for scrolling camera functionality
         self.x_start = 0
         self.y_start = 0
 
+        # the part of the map the last field of view was computed in, so the next one only has to clear that.
+        self.fov_window = (slice(None), slice(None))
+        # the player position, radius and tiles_version the current field of view was computed for.
+        self.fov_key: Optional[Tuple[int, int, int, int]] = None
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("fov_window", (slice(None), slice(None)))
+        self.__dict__.pop("tiles_version", None)  # Kept by hand before it was read from tiles.
+        self.__dict__.setdefault("fov_key", None)
+        self.__dict__.setdefault("entity_version", 0)
+        self.__dict__.setdefault("visibility_version", 0)
+        self.__dict__.setdefault("names_at_mouse_cache", (None, ""))
+        self.__dict__.setdefault("unique_names", set())
+        if isinstance(self.tiles, np.ndarray):
+            # saved with dense arrays, before tiles were stored in chunks.
+            self.tiles = ChunkedArray.from_array(self.tiles, tile_types.palette[tile_types.wall])
+            self.visible = ChunkedArray.from_array(self.visible, False)
+            self.explored = ChunkedArray.from_array(self.explored, False)
+        if self.tiles.dtype == tile_types.tile_dt:
+            # saved with a tile_dt record per tile, before tiles were stored as palette ids.
+            self.tiles = ChunkedArray.from_array(tile_types.ids_of(np.asarray(self.tiles)), tile_types.wall)
+        # an index from an older save has to be rebuilt, but the entities in the save may not be restored yet while
+        # this runs, so that is left to finish_loading.
+        self._entity_index_stale = "render_layers" not in state or isinstance(state["blocking_occupancy"], np.ndarray)
+
+    @property
+    def tiles_version(self) -> int:
+        """
+        Changes whenever tiles are written, so the field of view and the paths monsters planned over the old tiles
+        are worked out again.
+        """
+        return self.tiles.version
+
+    def walkable(self, index: Any = ...) -> Any:
+        """Return whether the tiles at index, which is any index tiles takes, can be walked over."""
+        return tile_types.walkable[self.tiles[index]]
+
+    def transparent(self, index: Any = ...) -> Any:
+        """Return whether the tiles at index, which is any index tiles takes, let light through."""
+        return tile_types.transparent[self.tiles[index]]
+
+    def movement_cost(self, region: Tuple[slice, slice]) -> np.ndarray:
+        """Return the cost of stepping onto each tile in region, for tcod's pathfinding, where 0 is a wall."""
+        # Copy the walkable array.
+        cost = np.array(self.walkable(region), dtype=np.int8)
+
+        # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
+        # Add to the cost of a blocked position.
+        # A lower number means more enemies will crowd behind each other in
+        # hallways.  A higher number means enemies will take longer paths in
+        # order to surround the player.
+        cost[(self.blocking_occupancy[region] > 0) & (cost > 0)] += 10
+        return cost
+
+    def finish_loading(self) -> None:
+        """Rebuild anything an older save didn't store, once everything in the save has been restored."""
+        if self._entity_index_stale:
+            self.rebuild_entity_index()
+            self._entity_index_stale = False
+
     @property
     def gamemap(self) -> GameMap:
         return self
 
     @property
-    def actors(self) -> Iterator[Actor]:
-        """Iterate over this maps living actors."""
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+    def actors(self) -> Tuple[Actor, ...]:
+        """
+        This maps living actors.  A snapshot is returned, so it is safe to iterate over while actors die.
+        """
+        return tuple(self._live_actors)
+
+    @property
+    def corpses(self) -> Tuple[Actor, ...]:
+        """This maps dead actors."""
+        return tuple(self._corpses)
 
     @property
-    def items(self) -> Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity, Item))
+    def items(self) -> Tuple[Item, ...]:
+        """This maps items lying on the floor."""
+        return tuple(self._items)
+
+    def add_entity(self, entity: Entity) -> None:
+        """Add entity to this map at its current position."""
+        if entity in self._indexed_entities:
+            self._unindex_entity(entity)
+        self.entities.add(entity)
+        self._index_entity(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove entity from this map."""
+        self.entities.remove(entity)
+        self._unindex_entity(entity)
+
+    def update_entity(self, entity: Entity) -> None:
+        """Re-index entity after its position, blocks_movement, liveliness or render_order changed."""
+        self._unindex_entity(entity)
+        self._index_entity(entity)
+
+    def _index_entity(self, entity: Entity) -> None:
+        location = entity.x, entity.y
+        blocks = entity.blocks_movement
+        self.entities_by_location.setdefault(location, []).append(entity)
+        if blocks:
+            self.blocking_occupancy[location] += 1
+
+        collection = self._collection_for(entity)
+        if collection is not None:
+            collection.add(entity)
+
+        render_order = entity.render_order
+        self.render_layers[render_order][location] += 1
+        self._indexed_entities[entity] = location, blocks, collection, render_order
+        self.entity_version += 1
+
+    def _unindex_entity(self, entity: Entity) -> None:
+        location, blocks, collection, render_order = self._indexed_entities.pop(entity)
+        if collection is not None:
+            collection.remove(entity)
+        self.render_layers[render_order][location] -= 1
+        entities_here = self.entities_by_location[location]
+        entities_here.remove(entity)
+        if not entities_here:
+            del self.entities_by_location[location]
+        if blocks:
+            self.blocking_occupancy[location] -= 1
+        self.entity_version += 1
+
+    def _collection_for(self, entity: Entity) -> Optional[Set]:
+        if isinstance(entity, Actor):
+            return self._live_actors if entity.is_alive else self._corpses
+        if isinstance(entity, Item):
+            return self._items
+        return None
+
+    def rebuild_entity_index(self) -> None:
+        """Rebuild the position index and entity collections from scratch from the entities set."""
+        self.entities_by_location = {}
+        self.blocking_occupancy = ChunkedArray((self.width, self.height), np.int16, 0)
+        self.render_layers = {
+            render_order: ChunkedArray((self.width, self.height), np.int16, 0) for render_order in RenderOrder
+        }
+        self._live_actors = set()
+        self._corpses = set()
+        self._items = set()
+        self._indexed_entities = {}
+        for entity in self.entities:
+            self._index_entity(entity)
+
+    def check_entity_index(self) -> None:
+        """
+        Raise AssertionError if the position index or entity collections have drifted from the entities set, such
+        as after an entity's position was changed without going through place or move.  Meant for tests and
+        debugging.
+        """
+        expected_locations: Dict[Tuple[int, int], List[Entity]] = {}
+        expected_occupancy = np.zeros((self.width, self.height), dtype=np.int16)
+        expected_layers = {render_order: np.zeros_like(expected_occupancy) for render_order in self.render_layers}
+        for entity in self.entities:
+            expected_locations.setdefault((entity.x, entity.y), []).append(entity)
+            if entity.blocks_movement:
+                expected_occupancy[entity.x, entity.y] += 1
+            expected_layers[entity.render_order][entity.x, entity.y] += 1
+
+        if set(self._indexed_entities) != self.entities:
+            raise AssertionError("indexed entities don't match the entities set")
+        for location in expected_locations.keys() | self.entities_by_location.keys():
+            expected = expected_locations.get(location, [])
+            indexed = self.entities_by_location.get(location, [])
+            if len(expected) != len(indexed) or set(expected) != set(indexed):
+                raise AssertionError(
+                    f"entities at {location}: indexed {[entity.name for entity in indexed]}, "
+                    f"actually {[entity.name for entity in expected]}"
+                )
+        mismatched = np.argwhere(expected_occupancy != np.asarray(self.blocking_occupancy))
+        if len(mismatched):
+            raise AssertionError(f"blocking occupancy is wrong at {[tuple(xy) for xy in mismatched.tolist()]}")
+        for render_order, layer in self.render_layers.items():
+            mismatched = np.argwhere(expected_layers[render_order] != np.asarray(layer))
+            if len(mismatched):
+                raise AssertionError(
+                    f"{render_order.name} render layer is wrong at {[tuple(xy) for xy in mismatched.tolist()]}"
+                )
+
+        for collection in (self._live_actors, self._corpses, self._items):
+            for entity in self.entities:
+                if (self._collection_for(entity) is collection) != (entity in collection):
+                    raise AssertionError(f"{entity.name} is in the wrong entity collection")
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        """Return the entities standing at x, y."""
+        return list(self.entities_by_location.get((x, y), ()))
 
     def get_blocking_entity_at_location(
             self, location_x: int, location_y: int,
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                    entity.blocks_movement
-                    and entity.x == location_x
-                    and entity.y == location_y
-            ):
+        if not self.in_bounds(location_x, location_y) or not self.blocking_occupancy[location_x, location_y]:
+            return None
+
+        for entity in self.entities_by_location[location_x, location_y]:
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int, ) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.entities_by_location.get((x, y), ()):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
+    def get_actors_in_region(self, region: Tuple[slice, slice]) -> List[Actor]:
+        """Return the living actors inside region, a pair of slices as returned by region_around."""
+        x_slice, y_slice = region
+        actors = []
+        occupied = np.argwhere(self.render_layers[RenderOrder.ACTOR][region] > 0) + (x_slice.start, y_slice.start)
+        for x, y in occupied.tolist():
+            for entity in self.entities_by_location[x, y]:
+                if isinstance(entity, Actor) and entity.is_alive:
+                    actors.append(entity)
+        return actors
+
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def region_around(self, x: int, y: int, half_width: int, half_height: int) -> Tuple[slice, slice]:
+        """Return the slices of the rectangle reaching half_width and half_height out from x, y, cut to the map."""
+        return (
+            slice(max(0, x - half_width), min(self.width, x + half_width + 1)),
+            slice(max(0, y - half_height), min(self.height, y + half_height + 1)),
+        )
+
+    def camera_window(self) -> Tuple[int, int, int, int]:
+        """
+        Return the x_start, y_start, x_end and y_end of the camera, centered on the player where the map allows it.
+        """
+        viewport = self.engine.viewport
+        camera_width = min(viewport.camera_width, self.width)
+        camera_height = min(viewport.camera_height, self.height)
+
+        # center the player in the camera, but snap the camera to the edges of the map rather than going past them.
+        x_start = min(max(0, self.engine.player.x - camera_width // 2), self.width - camera_width)
+        y_start = min(max(0, self.engine.player.y - camera_height // 2), self.height - camera_height)
+
+        return x_start, y_start, x_start + camera_width, y_start + camera_height
+
     def render(self, console: Console) -> None:
         """
         Renders the map through the scrolling camera.
         """
-        # the width of the camera
-        camera_width = 50
-        # the height of the camera
-        camera_height = 50
-
-        # attempting to center the player in the screen
-        x_start = self.engine.player.x - self.gamemap.width // 2
-        y_start = self.engine.player.y - self.gamemap.height // 2
-
-        # There is a chance that the camera is set out of bounds, and thus we
-        # must correct it so that it can only be as far left as 0, the edge of the screen.
-
-        # this provides the actual x_start so that if the player is too far left it snaps
-        # the camera to the left/top of the map rather than going past it.
-        x_start = max(0, x_start)
-        y_start = max(0, y_start)
-
-        # now we need to calculate where the camera ends
-        # since the width of the camera, for now, is set here as camera_width and same for the height, we need to
-        # calculate if adding this with would go over and if we should simply snap the camera to
-        # the right/bottom of the map
-        x_end = min(x_start + camera_width, self.gamemap.width)
-        y_end = min(y_start + camera_height, self.gamemap.height)
-
-        # now that we have where to begin the camera and where to end, we need to go about adding the appropriate
-        # tiles
-
-        # Fill the console with the shroud tile
-        # console.tiles_rgb[:, :] = tile_types.SHROUD
-
-        # loop through each coordinate in the camera and draw the appropriate tile
-        for x in range(x_start, x_end):
-            for y in range(y_start, y_end):
-                # Draw the tile on the console
-                if self.visible[x, y]:
-                    # where the tiles will be shifted to
-                    console_x = x - x_start
-                    console_y = y - y_start
-
-                    if self.tiles[x, y] == tile_types.wall:
-                        console.tiles_rgb[console_x, console_y] = tile_types.wall["light"]
-                    elif self.tiles[x, y] == tile_types.floor:
-                        console.tiles_rgb[console_x, console_y] = tile_types.floor["light"]
-                    elif self.tiles[x, y] == tile_types.up_stairs:
-                        console.tiles_rgb[console_x, console_y] = tile_types.up_stairs["light"]
-                    elif self.tiles[x, y] == tile_types.down_stairs:
-                        console.tiles_rgb[console_x, console_y] = tile_types.down_stairs["light"]
-
-                elif self.explored[x, y]:
-                    # where the tiles will be shifted to
-                    console_x = x - x_start
-                    console_y = y - y_start
-                    if self.tiles[x, y] == tile_types.wall:
-                        console.tiles_rgb[console_x, console_y] = tile_types.wall["dark"]
-                    elif self.tiles[x, y] == tile_types.floor:
-                        console.tiles_rgb[console_x, console_y] = tile_types.floor["dark"]
-                    elif self.tiles[x, y] == tile_types.up_stairs:
-                        console.tiles_rgb[console_x, console_y] = tile_types.up_stairs["dark"]
-                    elif self.tiles[x, y] == tile_types.down_stairs:
-                        console.tiles_rgb[console_x, console_y] = tile_types.down_stairs["dark"]
-
-        # same as before, we sort all the entities so that the render order is correct.
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
+        x_start, y_start, x_end, y_end = self.camera_window()
+
+        # the camera window as slices of the map, and the part of the console it is drawn onto.
+        camera = (slice(x_start, x_end), slice(y_start, y_end))
+        screen = console.tiles_rgb[: x_end - x_start, : y_end - y_start]
+
+        # visible tiles use their light graphics, explored ones their dark graphics, and anything else keeps
+        # what is already on the console.
+        tile_ids = self.tiles[camera]
+        screen[...] = np.where(
+            self.visible[camera],
+            tile_types.light[tile_ids],
+            np.where(self.explored[camera], tile_types.dark[tile_ids], screen),
         )
 
-        # looping through each entity, if they are visible we must shift the location they are rendered
-        # at as well.
-        for entity in entities_sorted_for_rendering:
-            if self.visible[entity.x, entity.y]:
-                # Calculate the entity's rendering position
-                render_x = entity.x - x_start
-                render_y = entity.y - y_start
-
-                console.print(
-                    x=render_x, y=render_y, string=entity.char, fg=entity.color
-                )
+        # draw the render layers from the bottom up, looking only at the visible tiles in the camera that have
+        # something on that layer, and shift them to where the camera puts them on the console.
+        visible = self.visible[camera]
+        for render_order in sorted(RenderOrder, key=lambda order: order.value):
+            occupied = visible & (self.render_layers[render_order][camera] > 0)
+            for render_x, render_y in np.argwhere(occupied).tolist():
+                for entity in self.entities_by_location[render_x + x_start, render_y + y_start]:
+                    if entity.render_order is render_order:
+                        console.print(
+                            x=render_x, y=render_y, string=entity.char, fg=entity.color
+                        )
 
         self.x_start = x_start
         self.y_start = y_start
@@ -180,7 +404,9 @@ class GameWorld:
             max_rooms: int,
             room_min_size: int,
             room_max_size: int,
-            current_floor: int = 0
+            current_floor: int = 0,
+            floor_cache: Optional[FloorCache] = None,
+            pregenerate: bool = True,
     ):
         self.engine = engine
 
@@ -194,44 +420,145 @@ class GameWorld:
 
         self.current_floor = current_floor
 
+        # optional on-disk cache of generated floors, used by testing and benchmarking runs.
+        self.floor_cache = floor_cache
+
+        # whether to build the next floor in a worker process.  Scripts without an `if __name__ == "__main__"` guard
+        # can't start one, and headless runs and benchmarks are simpler to time without it.
+        self.pregenerate = pregenerate
+
         self.upstairs_saves = []
         self.downstairs_saves = []
 
-    def generate_floor(self) -> None:
-        from procgen import generate_rectangular_dungeon, generate_cellular_automata_dungeon, \
-            generate_simplex_noise_dungeon
+        # names of the unique entities placed on the floors generated so far, which later floors don't place again.
+        self.placed_unique_names: Set[str] = set()
+
+        # the floor being built ahead of time in a worker process, as (spec, future).
+        self._pregeneration: Optional[Tuple[FloorSpec, Future]] = None
+
+    def __getstate__(self) -> dict:
+        # a pending worker job can't be pickled, so a saved game simply starts its pre-generation over.
+        state = self.__dict__.copy()
+        state["_pregeneration"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("floor_cache", None)
+        self.__dict__.setdefault("pregenerate", True)
+        self.__dict__.setdefault("placed_unique_names", set())
+        self._pregeneration = None
+
+    def floor_spec(self, floor: int) -> FloorSpec:
+        """Return the generation spec for the given floor, using the engine's current procgen type."""
+        from procgen import FloorSpec
+
+        return FloorSpec(
+            procgen_type=self.engine.procgen_type,
+            seed=self.engine.seed,
+            floor=floor,
+            map_width=self.map_width,
+            map_height=self.map_height,
+            max_rooms=self.max_rooms,
+            room_min_size=self.room_min_size,
+            room_max_size=self.room_max_size,
+            placed_unique_names=frozenset(self.placed_unique_names),
+        )
 
+    def generate_floor(self) -> None:
         self.current_floor += 1
 
-        if self.engine.procgen_type == "Rectangular Room":
-            self.engine.game_map = generate_rectangular_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-            )
-
-        elif self.engine.procgen_type == "Cellular Automata":
-            self.engine.game_map = generate_cellular_automata_dungeon(
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-                number_of_steps=5,
-                max_rooms=self.max_rooms
-            )
-
-        elif self.engine.procgen_type == "Simplex Noise":
-            # may change later
-            self.engine.seed = random.randint(0, 50)
-            self.engine.game_map = generate_simplex_noise_dungeon(
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-                seed=self.engine.seed,
-                max_rooms=self.max_rooms
-            )
+        game_map = self.collect_pregenerated_floor()
+        if game_map is None:
+            game_map = self.build_floor(self.floor_spec(self.current_floor))
+
+        self.engine.game_map = game_map
+        self.placed_unique_names |= game_map.unique_names
+
+        self.pregenerate_next_floor()
+
+    def build_floor(self, spec: FloorSpec) -> GameMap:
+        """Generate the floor for spec right here, or load it from the floor cache if it's been generated before."""
+        from procgen import generate_floor_from_spec
+
+        if self.floor_cache is not None:
+            game_map = self.floor_cache.load(spec, self.engine)
+            if game_map is not None:
+                return game_map
+
+        start = time.perf_counter()
+        game_map = generate_floor_from_spec(spec, self.engine)
+
+        if self.floor_cache is not None:
+            player_start = self.engine.player.x, self.engine.player.y
+            self.floor_cache.store(spec, game_map, player_start, time.perf_counter() - start)
+        return game_map
+
+    def pregenerate_next_floor(self) -> None:
+        """
+        Start building the floor below the current one in a worker process, if there is a way down and it hasn't
+        been generated already.
+        """
+        from procgen import generate_detached_floor
+
+        if not self.pregenerate:
+            return
+
+        game_map = self.engine.game_map
+        if self.downstairs_saves or game_map.tiles[game_map.downstairs_location] != tile_types.down_stairs:
+            return
+
+        if self._pregeneration is not None:
+            spec, future = self._pregeneration
+            if spec.floor == self.current_floor + 1 and spec.procgen_type == self.engine.procgen_type \
+                    and spec.seed == self.engine.seed and spec.placed_unique_names == self.placed_unique_names:
+                return  # Already being built.
+            future.cancel()
+
+        spec = self.floor_spec(self.current_floor + 1)
+        if self.floor_cache is not None and spec in self.floor_cache:
+            return  # Loading it from the cache is already quick.
+
+        try:
+            self._pregeneration = (spec, floor_pool().submit(generate_detached_floor, spec))
+        except BrokenProcessPool:
+            # the worker died, start a fresh one next time and generate this floor when it's reached.
+            reset_floor_pool()
+
+    def collect_pregenerated_floor(self) -> Optional[GameMap]:
+        """
+        Return the pre-generated map for the current floor, attached to this engine with the player placed on it.
+        Returns None if the worker isn't finished or was building something else.
+        """
+        if self._pregeneration is None:
+            return None
+
+        spec, future = self._pregeneration
+        self._pregeneration = None
+
+        if (
+                spec.floor != self.current_floor
+                or spec.procgen_type != self.engine.procgen_type
+                or spec.seed != self.engine.seed
+                or spec.placed_unique_names != self.placed_unique_names
+                or not future.done()
+        ):
+            future.cancel()
+            return None
+
+        try:
+            game_map, generation_time = future.result()
+        except Exception:
+            traceback.print_exc()  # Fall back to generating the floor here.
+            return None
+
+        game_map.engine = self.engine
+        # the player always starts a floor below the first on its up stairs.
+        self.engine.player.place(*game_map.upstairs_location, game_map)
+
+        if self.floor_cache is not None:
+            self.floor_cache.store(spec, game_map, game_map.upstairs_location, generation_time)
+        return game_map
 
     def downstairs_floor(self) -> None:
         # deleting the previous upstairs save
@@ -249,6 +576,7 @@ class GameWorld:
             self.engine.player.place(self.engine.game_map.upstairs_location[0],
                                      self.engine.game_map.upstairs_location[1],
                                      self.engine.game_map)
+            self.pregenerate_next_floor()
 
     def upstairs_floor(self) -> None:
         # deleting the previous downstairs save
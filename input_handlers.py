@@ -83,7 +83,26 @@ MainGameEventHandler will become the active handler.
 """
 
 
+# events none of the handlers draw differently after, so they don't need a new frame on their own.
+PASSIVE_EVENTS = (
+    tcod.event.KeyUp,
+    tcod.event.MouseButtonUp,
+    tcod.event.MouseMotion,
+    tcod.event.MouseWheel,
+    tcod.event.TextInput,
+)
+
+
 class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
+    # True when what this handler draws may have changed since it was last rendered.  The main loop only renders
+    # and presents a frame while it is set, and clears it afterwards.
+    frame_dirty = True
+
+    def dispatch(self, event: tcod.event.Event) -> Optional[ActionOrHandler]:
+        if not isinstance(event, PASSIVE_EVENTS):
+            self.frame_dirty = True
+        return super().dispatch(event)
+
     def handle_events(self, event: tcod.event.Event) -> BaseEventHandler:
         """Handle an event and return the next active event handler."""
         state = self.dispatch(event)
@@ -172,8 +191,12 @@ class EventHandler(BaseEventHandler):
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
         if self.engine.game_map.in_bounds(event.tile.x, event.tile.y):
-            self.engine.mouse_location = event.tile.x + self.engine.game_map.x_start, \
-                                         event.tile.y + self.engine.game_map.y_start
+            mouse_location = event.tile.x + self.engine.game_map.x_start, \
+                             event.tile.y + self.engine.game_map.y_start
+            if mouse_location != self.engine.mouse_location:
+                # only moving onto another tile changes the hover names and the targeting cursor.
+                self.engine.mouse_location = mouse_location
+                self.frame_dirty = True
 
     def on_render(self, console: tcod.Console) -> None:
         self.engine.render(console)
@@ -215,7 +238,7 @@ class CharacterScreenEventHandler(AskUserEventHandler):
     def on_render(self, console: tcod.Console) -> None:
         super().on_render(console)
 
-        if self.engine.player.x <= 30:
+        if self.engine.player.x - self.engine.game_map.x_start <= 30:
             x = 40
         else:
             x = 0
@@ -261,7 +284,7 @@ class LevelUpEventHandler(AskUserEventHandler):
     def on_render(self, console: tcod.Console) -> None:
         super().on_render(console)
 
-        if self.engine.player.x <= 30:
+        if self.engine.player.x - self.engine.game_map.x_start <= 30:
             x = 40
         else:
             x = 0
@@ -329,7 +352,7 @@ class SelectProceduralGenerationHandler(AskUserEventHandler):
     def on_render(self, console: tcod.Console) -> None:
         super().on_render(console)
 
-        if self.engine.player.x <= 30:
+        if self.engine.player.x - self.engine.game_map.x_start <= 30:
             x = 40
         else:
             x = 0
@@ -382,6 +405,8 @@ class SelectProceduralGenerationHandler(AskUserEventHandler):
                 self.engine.procgen_type = "Simplex Noise"
             elif index == 3:
                 self.engine.procgen_type = random.choice(self.engine.procgen_types)
+            # the floor being built in the background was for the old technique.
+            self.engine.game_world.pregenerate_next_floor()
         elif key == tcod.event.K_ESCAPE:
             return self.on_exit()
         else:
@@ -433,9 +458,10 @@ class SelectIndexHandler(AskUserEventHandler):
             dx, dy = MOVE_KEYS[key]
             x += dx * modifier
             y += dy * modifier
-            # Clamp the cursor index to the map size.
-            x = max(0, min(x, self.engine.game_map.width - 1))
-            y = max(0, min(y, self.engine.game_map.height - 1))
+            # Clamp the cursor index to the part of the map the camera shows.
+            x_start, y_start, x_end, y_end = self.engine.game_map.camera_window()
+            x = max(x_start, min(x, x_end - 1))
+            y = max(y_start, min(y, y_end - 1))
             self.engine.mouse_location = x, y
             return None
         elif key in CONFIRM_KEYS:
@@ -552,7 +578,8 @@ class MainGameEventHandler(EventHandler):
             return LookHandler(self.engine)
         elif key == tcod.event.K_LALT:
             return AutoExploreHandler(self.engine)
-        elif key == tcod.event.K_BACKQUOTE:
+        # the backquote key, looked up by its character since newer versions of tcod renamed K_BACKQUOTE to K_GRAVE.
+        elif key == tcod.event.KeySym(ord("`")):
             if "Longbow" in self.engine.player.inventory.items.keys():
                 if self.engine.player.equipment.item_is_equipped(self.engine.player.inventory.items["Longbow"][-1][-1]):
                     if "Arrow" in self.engine.player.inventory.items.keys():
@@ -730,7 +757,7 @@ class InventoryEventHandler(AskUserEventHandler):
         if height <= 3:
             height = 3
 
-        if self.engine.player.x <= 30:
+        if self.engine.player.x - self.engine.game_map.x_start <= 30:
             x = 40
         else:
             x = 0
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-import traceback
+import argparse
 
 import tcod
-import color
 import exceptions
+import game_loop
+import game_map
 import setup_game
 import input_handlers
 
@@ -16,6 +17,12 @@ def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Delve the Dungeon")
+    parser.add_argument(
+        "--stats", action="store_true", help="Print how many frames were drawn and the engine's counters on exit."
+    )
+    args = parser.parse_args()
+
     screen_width = 80
     screen_height = 50
 
@@ -33,23 +40,20 @@ def main() -> None:
             vsync=True,
     ) as context:
         root_console = tcod.Console(screen_width, screen_height, order="F", )
+        # how many times around the loop a frame was drawn, and how many times nothing had changed.
+        rendered_frames = 0
+        skipped_frames = 0
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                if game_loop.render_frame(handler, root_console):
+                    context.present(root_console)
+                    rendered_frames += 1
+                else:
+                    skipped_frames += 1
 
-                try:
-                    for event in tcod.event.wait():
-                        context.convert_event(event)
-                        handler = handler.handle_events(event)
-                except Exception:  # Handle exceptions in game.
-                    traceback.print_exc()  # Print error to stderr.
-                    # Then print the error to the message log.
-                    if isinstance(handler, input_handlers.EventHandler):
-                        handler.engine.message_log.add_message(
-                            traceback.format_exc(), color.error
-                        )
+                for event in tcod.event.wait():
+                    context.convert_event(event)
+                    handler = game_loop.handle_event(handler, event)
         except exceptions.QuitWithoutSaving:
             raise
         except SystemExit:  # Save and quit.
@@ -58,6 +62,13 @@ def main() -> None:
         except BaseException:  # Save on any other unexpected exception.
             save_game(handler, "savegame.sav")
             raise
+        finally:
+            # don't wait for a floor the player will never reach.
+            game_map.reset_floor_pool()
+            if args.stats:
+                print(f"Rendered {rendered_frames} frames, skipped {skipped_frames}.")
+                if isinstance(handler, input_handlers.EventHandler):
+                    print(handler.engine.debug_summary())
 
 
 if __name__ == "__main__":
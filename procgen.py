@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import random
-from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+import functools
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, TypeVar, TYPE_CHECKING
 
-import numpy.random
+import numpy as np  # type: ignore
 import tcod
 
 import entity_factories
@@ -14,9 +14,16 @@ import tile_types
 import opensimplex
 
 if TYPE_CHECKING:
+    from chunked_array import ChunkedArray
     from engine import Engine
     from entity import Entity, Actor
 
+# bump this whenever a change to the generators changes the floors they produce for the same seed, so cached floors
+# from the old generators aren't reused.
+GENERATOR_VERSION = 6
+
+T = TypeVar("T")
+
 max_items_by_floor = [
     (1, (2, 3)),
     (5, (3, 5)),
@@ -156,72 +163,96 @@ unique_entities_chances_by_floor: Dict[int, List[Tuple[Entity, Tuple[int, int]]]
 }
 
 
-def get_max_value_for_floor(
-        max_value_by_floor: List[Tuple[int, int]], floor: int
-) -> int:
-    current_value = 0
+def floor_rng(run_seed: int, floor: int) -> np.random.Generator:
+    """
+    Return the random number generator for one floor of a run.
+
+    Every random choice made while generating a floor is drawn from this generator, so the same run seed and floor
+    always produce the same map and spawns, in whatever order or process the floors are built.
+    """
+    return np.random.default_rng([run_seed, floor])
 
-    for floor_minimum, value in max_value_by_floor:
-        lower_bound = value[0]
-        upper_bound = value[1]
+
+def resolve_for_floor(values_by_floor: Iterable[Tuple[int, T]], floor: int, default: T) -> T:
+    """Return the value of the highest floor key that is at or below floor, or default if there isn't one."""
+    value = default
+    for floor_minimum, floor_value in sorted(values_by_floor, key=lambda entry: entry[0]):
         if floor_minimum > floor:
             break
-        else:
-            current_value = random.randint(lower_bound, upper_bound)
+        value = floor_value
+    return value
 
-    return current_value
 
+class WeightedTable:
+    """
+    One floor's entry from a chances table, with the weight ranges held as arrays so they can be rolled at once.
+    """
 
-def get_entities_at_random(
-        weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int, int]]],
-        number_of_entities: int,
-        floor: int,
-) -> List[Entity]:
-    entity_weighted_chances = {}
+    def __init__(self, entries: List[Tuple[Entity, Tuple[int, int]]]):
+        self.entities = [entity for entity, _ in entries]
+        self.lower_bounds = np.array([bounds[0] for _, bounds in entries], dtype=np.int64)
+        self.upper_bounds = np.array([bounds[1] for _, bounds in entries], dtype=np.int64)
 
-    for floor_key in range(floor, -1, -1):
-        if floor_key in weighted_chances_by_floor:
-            entity_weighted_chances = dict(weighted_chances_by_floor[floor_key])
-            break
+    def roll_weights(self, rng: np.random.Generator) -> np.ndarray:
+        """Roll every entry's weight from its range."""
+        return rng.integers(self.lower_bounds, self.upper_bounds, endpoint=True)
 
-    entities = []
-    entity_weighted_chance_values = []
-    for entity, value in entity_weighted_chances.items():
-        lower_bound = value[0]
-        upper_bound = value[1]
-        chance = random.randint(lower_bound, upper_bound)
+    def sample(self, number_of_entities: int, rng: np.random.Generator) -> List[Entity]:
+        """Pick number_of_entities entities, with replacement, in proportion to freshly rolled weights."""
+        if not self.entities or number_of_entities <= 0:
+            return []
 
-        entities.append(entity)
-        entity_weighted_chance_values.append(chance)
+        cumulative_weights = np.cumsum(self.roll_weights(rng))
+        chosen_indices = np.searchsorted(
+            cumulative_weights, rng.random(number_of_entities) * cumulative_weights[-1], side="right"
+        )
+        return [self.entities[index] for index in chosen_indices.tolist()]
 
-    chosen_entities = random.choices(
-        entities, weights=entity_weighted_chance_values, k=number_of_entities
-    )
+    def roll_each(self, rng: np.random.Generator) -> List[Entity]:
+        """Give every entity its own rolled percent chance to be picked, and return the ones that were."""
+        if not self.entities:
+            return []
 
-    return chosen_entities
+        chances = self.roll_weights(rng)
+        picked = rng.random(len(self.entities)) < chances / 100
+        return [entity for entity, was_picked in zip(self.entities, picked.tolist()) if was_picked]
+
+
+class FloorTables:
+    """The monster, item and unique entity tables, and the spawn limits, that apply on one floor."""
+
+    def __init__(self, floor: int):
+        self.max_monsters = resolve_for_floor(max_monsters_by_floor, floor, (0, 0))
+        self.max_items = resolve_for_floor(max_items_by_floor, floor, (0, 0))
+
+        self.monsters = WeightedTable(resolve_for_floor(enemy_chances.items(), floor, []))
+        self.items = WeightedTable(resolve_for_floor(item_chances.items(), floor, []))
+        self.unique_entities = WeightedTable(resolve_for_floor(unique_entities_chances_by_floor.items(), floor, []))
+
+
+@functools.lru_cache(maxsize=None)
+def floor_tables(floor: int) -> FloorTables:
+    """Return the tables for floor, compiled the first time they are asked for."""
+    return FloorTables(floor)
 
 
 def place_unique_entities(
         floor: int,
-        accessible_tiles: List[Tuple[int, int]],
+        accessible_tiles: AccessibleTiles,
         dungeon: GameMap,
-        unique_entities_chances: Dict[int, List[Tuple[Entity, int, int]]]
+        rng: np.random.Generator,
 ) -> None:
-    unique_entity_weighted_chances = {}
-
-    for floor_key in range(floor, -1, -1):
-        if floor_key in unique_entities_chances:
-            unique_entity_weighted_chances = dict(unique_entities_chances[floor_key])
-            break
+    chosen_entities = floor_tables(floor).unique_entities.roll_each(rng)
+    # each unique entity is placed at most once in a run, so skip the ones already on this or an earlier floor.
+    placed_names = dungeon.engine.game_world.placed_unique_names
+    chosen_entities = [
+        entity for entity in chosen_entities
+        if entity.name not in placed_names and entity.name not in dungeon.unique_names
+    ]
 
-    for entity, value in unique_entity_weighted_chances.items():
-        lower_bound = value[0]
-        upper_bound = value[1]
-        chance = random.randint(lower_bound, upper_bound)
-        if random.random() < chance / 100:
-            x, y = random.choice(accessible_tiles)
-            accessible_tiles.remove((x, y))
-            entity.place(x, y, dungeon)
+    for entity, (x, y) in zip(chosen_entities, accessible_tiles.sample(len(chosen_entities), rng).tolist()):
+        entity.spawn(dungeon, x, y)
+        dungeon.unique_names.add(entity.name)
 
 
 def scale_entities(
@@ -261,69 +292,48 @@ class RectangularRoom:
 
 
 class CellularAutomata:
-    def __init__(self, width, height, chance_to_come_alive=0.4, birth_limit=4, death_limit=3):
+    """
+    Cave generator backed by a boolean NumPy grid, where True is a live (wall) cell.
+
+    Neighbours are counted by summing the eight shifted views of a padded copy of the grid, so a simulation step
+    is a handful of whole-array operations instead of a Python call per cell.  Cells off the edge of the map are
+    padded as alive, which keeps the caves closed in at the borders.
+    """
+
+    def __init__(self, width, height, rng: np.random.Generator, chance_to_come_alive=0.4, birth_limit=4,
+                 death_limit=3):
         self.map_width = width
         self.map_height = height
+        self.rng = rng
 
         self.chance_to_come_alive = chance_to_come_alive
         self.birth_limit = birth_limit
         self.death_limit = death_limit
 
-        self.map = []
-
-    def initialize_map(self):
-        for x in range(self.map_width):
-            row = []
-            for y in range(self.map_height):
-                if random.random() <= self.chance_to_come_alive:
-                    row.append(True)
-                else:
-                    row.append(False)
-            self.map.append(row)
+        self.map = np.zeros((width, height), dtype=bool)
+
+    def initialize_map(self) -> np.ndarray:
+        self.map = self.rng.random((self.map_width, self.map_height)) <= self.chance_to_come_alive
         return self.map
 
-    def do_simulation_step(self):
-        new_map = [[False] * self.map_height for _ in range(self.map_width)]
-
-        for x in range(self.map_width):
-            for y in range(self.map_height):
-                nbs_count = self.count_alive_neighbors(self.map, x, y)
-                # The new value is based on our simulation rules
-                # First, if a cell is alive but has too few neighbours, kill it.
-                if self.map[x][y]:
-                    if nbs_count < self.death_limit:
-                        new_map[x][y] = False
-                    else:
-                        new_map[x][y] = True
-                # Otherwise, if the cell is dead now, check if it has the right number of neighbours to be 'born'
-                else:
-                    if nbs_count > self.birth_limit:
-                        new_map[x][y] = True
-                    else:
-                        new_map[x][y] = False
-        return new_map
-
-    def count_alive_neighbors(self, map, x, y):
-        count = 0
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                neighbour_x = x + i
-                neighbour_y = y + j
-                # If we're looking at the middle point
-                if i == 0 and j == 0:
-                    # Do nothing, we don't want to add ourselves in!
-                    pass
-                # In case the index we're looking at is off the edge of the map
-                elif (
-                        neighbour_x < 0
-                        or neighbour_y < 0
-                        or neighbour_x >= self.map_width
-                        or neighbour_y >= self.map_height
-                ):
-                    count += 1
-                # Otherwise, a normal check of the neighbour
-                elif map[neighbour_x][neighbour_y]:
-                    count += 1
+    def do_simulation_step(self) -> np.ndarray:
+        nbs_count = self.count_alive_neighbors(self.map)
+        # The new value is based on our simulation rules
+        # A live cell survives unless it has too few neighbours, and a dead cell is 'born' if it has enough of them.
+        return np.where(self.map, nbs_count >= self.death_limit, nbs_count > self.birth_limit)
+
+    def count_alive_neighbors(self, map: np.ndarray) -> np.ndarray:
+        """Return the number of live neighbours of every cell, counting cells off the edge of the map as alive."""
+        padded = np.pad(map, 1, mode="constant", constant_values=True).astype(np.uint8)
+        width, height = map.shape
+
+        count = np.zeros((width, height), dtype=np.uint8)
+        for i in range(3):
+            for j in range(3):
+                # Skip the middle point, we don't want to add ourselves in!
+                if i == 1 and j == 1:
+                    continue
+                count += padded[i:i + width, j:j + height]
         return count
 
     def generate_dungeon(self, number_of_steps):
@@ -333,55 +343,106 @@ class CellularAutomata:
 
 
 class SimplexNoise:
-    def __init__(self, width: int, height: int, seed: int):
+    """
+    Multi-octave simplex noise sampled on the map's tile grid and thresholded into floor and wall tiles.
+
+    The map is filled in square chunks of chunk_size tiles, so only one chunk of noise values exists at a time and
+    peak memory stays bounded no matter how large the map is.
+    """
+
+    def __init__(
+            self,
+            width: int,
+            height: int,
+            rng: np.random.Generator,
+            octaves: int = 3,
+            frequency: float = 0.08,
+            persistence: float = 0.5,
+            threshold: float = -0.2,
+            chunk_size: int = 256,
+    ):
         self.map_width = width
         self.map_height = height
-        self.map = []
-
-        self.seed = seed
 
-    def initialize_map(self):
-        rng = numpy.random.default_rng(seed=self.seed)
-        ix = rng.random(self.map_width)
-        iy = rng.random(self.map_height)
-        self.map = opensimplex.noise2array(iy, ix).tolist()
-        return self.map
-
-
-def place_entities(dungeon: GameMap, floor_number: int, accessible_tiles: list[int]):
-    accessible_tiles = list(accessible_tiles)
+        self.octaves = octaves
+        self.frequency = frequency  # Noise cycles per tile for the first octave, each octave after doubles it.
+        self.persistence = persistence  # How much each octave's amplitude shrinks compared to the one before.
+        self.threshold = threshold  # Noise values at or above this become floor.
+        self.chunk_size = chunk_size
+
+        self.noise = opensimplex.OpenSimplex(seed=int(rng.integers(2 ** 31)))
+
+    def chunks(self) -> Iterator[Tuple[slice, slice]]:
+        """Yield the 2D array index of every chunk of the map."""
+        for x in range(0, self.map_width, self.chunk_size):
+            for y in range(0, self.map_height, self.chunk_size):
+                yield (
+                    slice(x, min(x + self.chunk_size, self.map_width)),
+                    slice(y, min(y + self.chunk_size, self.map_height)),
+                )
+
+    def sample(self, area: Tuple[slice, slice]) -> np.ndarray:
+        """Return the noise values, between -1 and 1, for the tiles in the given 2D array index."""
+        xs = np.arange(area[0].start, area[0].stop, dtype=np.float64)
+        ys = np.arange(area[1].start, area[1].stop, dtype=np.float64)
+
+        total = np.zeros((len(xs), len(ys)), dtype=np.float64)
+        amplitude = 1.0
+        frequency = self.frequency
+        for _ in range(self.octaves):
+            # noise2array returns its values indexed [x][y] when given (y, x).
+            total += amplitude * self.noise.noise2array(ys * frequency, xs * frequency)
+            amplitude *= self.persistence
+            frequency *= 2
+
+        return total / sum(self.persistence ** octave for octave in range(self.octaves))
+
+    def carve(self, tiles: ChunkedArray) -> np.ndarray:
+        """Write floor and wall tiles into tiles, one chunk at a time, and return a boolean mask of the floor."""
+        floor = np.zeros((self.map_width, self.map_height), dtype=bool)
+        for area in self.chunks():
+            floor[area] = self.sample(area) >= self.threshold
+            tiles[area] = np.where(floor[area], tile_types.floor, tile_types.wall)
+        return floor
+
+
+def place_entities(
+        dungeon: GameMap,
+        floor_number: int,
+        accessible_tiles: AccessibleTiles,
+        rng: np.random.Generator,
+        area: Optional[Tuple[slice, slice]] = None,
+        place_uniques: bool = True,
+):
+    """
+    Spawn this floor's share of monsters and items on free accessible tiles, inside area if one is given.
 
-    number_of_monsters = random.randint(
-        0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
-    )
-    number_of_items = random.randint(
-        0, get_max_value_for_floor(max_items_by_floor, floor_number)
-    )
+    Spawn positions are drawn all at once without replacement and are taken out of accessible_tiles, so later calls
+    sharing the same accessible_tiles can't place anything on top of them.
+    """
+    tables = floor_tables(floor_number)
 
-    monsters: List[Entity] = get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
-    )
-    items: List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
-    )
+    number_of_monsters = rng.integers(0, rng.integers(*tables.max_monsters, endpoint=True), endpoint=True)
+    number_of_items = rng.integers(0, rng.integers(*tables.max_items, endpoint=True), endpoint=True)
 
-    for entity in monsters + items:
-        x, y = random.choice(accessible_tiles)
+    monsters: List[Entity] = tables.monsters.sample(number_of_monsters, rng)
+    items: List[Entity] = tables.items.sample(number_of_items, rng)
 
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            entity.spawn(dungeon, x, y)
-            accessible_tiles.remove((x, y))
+    entities = monsters + items
+    for entity, (x, y) in zip(entities, accessible_tiles.sample(len(entities), rng, area).tolist()):
+        entity.spawn(dungeon, x, y)
 
-    place_unique_entities(floor_number, accessible_tiles, dungeon, unique_entities_chances_by_floor)
+    if place_uniques:
+        place_unique_entities(floor_number, accessible_tiles, dungeon, rng)
 
 
 def tunnel_between(
-        start: Tuple[int, int], end: Tuple[int, int]
+        start: Tuple[int, int], end: Tuple[int, int], rng: np.random.Generator
 ) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points."""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance.
+    if rng.random() < 0.5:  # 50% chance.
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -395,38 +456,125 @@ def tunnel_between(
         yield x, y
 
 
-def flood_fill(player: Entity, dungeon: GameMap):
-    start = (player.x, player.y)
-    stack = [start]
-    visited = set()
-    accessible_tiles = set()
-
-    while stack:
-        x, y = stack.pop()
-        visited.add((x, y))  # Mark the current coordinates as visited
+class AccessibleTiles:
+    """
+    The tiles a flood fill reached, stored as a boolean mask over the map.
 
-        if dungeon.tiles[x][y] == tile_types.floor:
-            accessible_tiles.add((x, y))
+    The (x, y) coordinate array is only materialized the first time it is asked for.  Tiles handed out through
+    pop(), sample() or remove() are cleared from the mask, so the mask doubles as an occupancy grid for spawning.
 
-        # Add neighboring tiles to the stack if they are accessible and haven't been visited
-        # only add neighboring tiles that are floor tiles, so that only the areas accessible to the player are
-        # added.
-        if x > 0 and (x - 1, y) not in visited and dungeon.tiles[x - 1][y] == tile_types.floor:
-            stack.append((x - 1, y))
-        if x < dungeon.width - 1 and (x + 1, y) not in visited and dungeon.tiles[x + 1][y] == tile_types.floor:
-            stack.append((x + 1, y))
-        if y > 0 and (x, y - 1) not in visited and dungeon.tiles[x][y - 1] == tile_types.floor:
-            stack.append((x, y - 1))
-        if y < dungeon.height - 1 and (x, y + 1) not in visited and dungeon.tiles[x][y + 1] == tile_types.floor:
-            stack.append((x, y + 1))
+    Sampling from the whole map walks one shuffled order of the accessible tiles, made on the first sample, skipping
+    tiles that have been taken since.  That keeps each sample about as cheap as the tiles it returns however large
+    the map is.
+    """
 
-    for x in range(dungeon.width):
-        for y in range(dungeon.height):
-            if (x, y) not in accessible_tiles:
-                dungeon.tiles[x][y] = tile_types.wall
+    def __init__(self, mask: np.ndarray):
+        self.mask = mask
+        self._count = int(np.count_nonzero(mask))
+        self._coordinates: Optional[np.ndarray] = None
+        # flat indices into mask of the accessible tiles in a random order, and how far sample() has got through it.
+        self._shuffled: Optional[np.ndarray] = None
+        self._cursor = 0
 
-    accessible_tiles.remove((player.x, player.y))
-    return accessible_tiles
+    @property
+    def coordinates(self) -> np.ndarray:
+        """Return the accessible tiles as an (N, 2) array of x, y coordinates."""
+        if self._coordinates is None:
+            self._coordinates = np.argwhere(self.mask)
+        return self._coordinates
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for x, y in self.coordinates.tolist():
+            yield x, y
+
+    def __contains__(self, location: Tuple[int, int]) -> bool:
+        return bool(self.mask[location])
+
+    def pop(self, index: int = -1) -> Tuple[int, int]:
+        """Remove and return the tile at the given index of the coordinate array."""
+        coordinates = self.coordinates
+        x, y = coordinates[index].tolist()
+        self._coordinates = np.delete(coordinates, index, axis=0)
+        self.mask[x, y] = False
+        self._count -= 1
+        return x, y
+
+    def remove(self, location: Tuple[int, int]) -> None:
+        if not self.mask[location]:
+            raise KeyError(location)
+        self.mask[location] = False
+        self._coordinates = None
+        self._count -= 1
+
+    def discard(self, location: Tuple[int, int]) -> None:
+        if self.mask[location]:
+            self.remove(location)
+
+    def sample(
+            self, count: int, rng: np.random.Generator, area: Optional[Tuple[slice, slice]] = None
+    ) -> np.ndarray:
+        """
+        Remove and return up to count distinct random tiles, inside area if one is given, as an (N, 2) array.
+        """
+        if area is None:
+            xs, ys = self._sample_shuffled(count, rng)
+        else:
+            # areas are rooms, small enough to look through every time.
+            candidates = np.flatnonzero(self.mask[area])
+            chosen = rng.choice(candidates, size=min(count, len(candidates)), replace=False)
+
+            xs, ys = np.unravel_index(chosen, self.mask[area].shape)
+            xs += area[0].start or 0
+            ys += area[1].start or 0
+
+        self.mask[xs, ys] = False
+        self._count -= len(xs)
+        self._coordinates = None
+        return np.column_stack((xs, ys))
+
+    def _sample_shuffled(self, count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the x and y coordinates of the next count tiles in the shuffled order that are still free."""
+        if self._shuffled is None:
+            self._shuffled = rng.permutation(np.flatnonzero(self.mask))
+
+        taken_xs, taken_ys = [], []
+        needed = min(count, self._count)
+        while needed > 0 and self._cursor < len(self._shuffled):
+            # look a little further ahead than needed, since some of the tiles may have been taken already.
+            batch = self._shuffled[self._cursor:self._cursor + needed * 2 + 8]
+            xs, ys = np.unravel_index(batch, self.mask.shape)
+            free = np.flatnonzero(self.mask[xs, ys])[:needed]
+            taken_xs.append(xs[free])
+            taken_ys.append(ys[free])
+            needed -= len(free)
+            self._cursor += int(free[-1]) + 1 if needed == 0 else len(batch)
+
+        if not taken_xs:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        return np.concatenate(taken_xs), np.concatenate(taken_ys)
+
+
+def reachable_mask(walkable: np.ndarray, start: Tuple[int, int]) -> np.ndarray:
+    """Return a boolean mask of every tile reachable from start with cardinal steps over walkable tiles."""
+    distance = np.full(walkable.shape, np.iinfo(np.int32).max, dtype=np.int32)
+    distance[start] = 0
+    tcod.path.dijkstra2d(distance, walkable.astype(np.int32), cardinal=1, diagonal=None)
+    return distance != np.iinfo(np.int32).max
+
+
+def flood_fill(player: Entity, dungeon: GameMap) -> AccessibleTiles:
+    """
+    Walls off every tile the player can't walk to, and returns the remaining accessible tiles (not counting the
+    one the player is standing on).
+    """
+    mask = reachable_mask(dungeon.walkable(), (player.x, player.y))
+    dungeon.tiles[~mask] = tile_types.wall
+
+    mask[player.x, player.y] = False
+    return AccessibleTiles(mask)
 
 
 def generate_rectangular_dungeon(
@@ -436,8 +584,16 @@ def generate_rectangular_dungeon(
         map_width: int,
         map_height: int,
         engine: Engine,
+        rng: np.random.Generator,
+        single_pass: bool = True,
 ) -> GameMap:
-    """Generate a new dungeon map."""
+    """
+    Generate a new dungeon map.
+
+    With single_pass, every room and tunnel is carved before the map is flood filled once, and each room then gets
+    its own spawn budget from the per-floor tables.  Without it, the map is flood filled and populated again after
+    every room is dug, which is how the generator originally worked.
+    """
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, entities=[player])
 
@@ -449,11 +605,11 @@ def generate_rectangular_dungeon(
     scale_entities(floor=engine.game_world.current_floor)
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = int(rng.integers(room_min_size, room_max_size, endpoint=True))
+        room_height = int(rng.integers(room_min_size, room_max_size, endpoint=True))
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = int(rng.integers(0, dungeon.width - room_width - 1, endpoint=True))
+        y = int(rng.integers(0, dungeon.height - room_height - 1, endpoint=True))
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
@@ -471,17 +627,31 @@ def generate_rectangular_dungeon(
             player.place(*new_room.center, dungeon)
         else:  # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            tunnel = np.array(list(tunnel_between(rooms[-1].center, new_room.center, rng)))
+            dungeon.tiles[tunnel[:, 0], tunnel[:, 1]] = tile_types.floor
 
             center_of_last_room = new_room.center
 
-        accessible_tiles = flood_fill(player, dungeon)
-        place_entities(dungeon, engine.game_world.current_floor, accessible_tiles)
+        if not single_pass:
+            accessible_tiles = flood_fill(player, dungeon)
+            for entity in dungeon.entities:
+                accessible_tiles.discard((entity.x, entity.y))
+            place_entities(dungeon, engine.game_world.current_floor, accessible_tiles, rng)
 
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
+    if single_pass:
+        accessible_tiles = flood_fill(player, dungeon)
+
+        for room in rooms:
+            place_entities(
+                dungeon, engine.game_world.current_floor, accessible_tiles, rng, area=room.inner, place_uniques=False
+            )
+
+        # unique entities are rolled once for the whole floor.
+        place_unique_entities(engine.game_world.current_floor, accessible_tiles, dungeon, rng)
+
     if engine.game_world.current_floor < 10:
         dungeon.tiles[center_of_last_room] = tile_types.down_stairs
         dungeon.downstairs_location = center_of_last_room
@@ -500,45 +670,46 @@ def generate_cellular_automata_dungeon(
         engine: Engine,
         number_of_steps: int,
         max_rooms: int,
+        rng: np.random.Generator,
 ) -> GameMap:
     """Generate a new dungeon map."""
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, entities=[player])
 
     accessible_tiles = []
+    dungeon.generation_attempts = 0
 
     scale_entities(floor=engine.game_world.current_floor)
 
     while len(accessible_tiles) <= 1000:
-        cellular_automata_floor = CellularAutomata(width=map_width, height=map_height)
+        dungeon.generation_attempts += 1
+        cellular_automata_floor = CellularAutomata(width=map_width, height=map_height, rng=rng)
         cellular_automata_floor.generate_dungeon(number_of_steps=number_of_steps)
 
-        valid_spawn_locations = []
+        # if it is False in the cellular automata, it is a floor tile. otherwise it is true and will
+        # be a wall tile
+        cave = ~cellular_automata_floor.map
+        dungeon.tiles[...] = tile_types.wall
+        dungeon.tiles[cave] = tile_types.floor
 
-        for x in range(map_width):
-            for y in range(map_height):
-                # if it is False in the cellular automata, it is a floor tile. otherwise it is true and will
-                # be a wall tile
-                if not cellular_automata_floor.map[x][y]:
-                    dungeon.tiles[x][y] = tile_types.floor
-                    valid_spawn_locations.append((x, y))
-
-        placement_x, placement_y = random.choice(valid_spawn_locations)
+        valid_spawn_locations = np.argwhere(cave)
+        placement_x, placement_y = valid_spawn_locations[rng.integers(len(valid_spawn_locations))].tolist()
         player.place(placement_x, placement_y, dungeon)
         # cleans up the map
         accessible_tiles = flood_fill(player, dungeon)
 
-        if engine.game_world.current_floor > 1:
-            dungeon.tiles[placement_x][placement_y] = tile_types.up_stairs
-            dungeon.upstairs_location = (placement_x, placement_y)
+    # the map is only populated once it has enough room, so nothing is left behind from the maps thrown away.
+    if engine.game_world.current_floor > 1:
+        dungeon.tiles[player.x, player.y] = tile_types.up_stairs
+        dungeon.upstairs_location = (player.x, player.y)
 
-        placement_x, placement_y = accessible_tiles.pop()
-        if engine.game_world.current_floor < 10:
-            dungeon.tiles[placement_x][placement_y] = tile_types.down_stairs
-            dungeon.downstairs_location = (placement_x, placement_y)
+    placement_x, placement_y = accessible_tiles.pop(rng.integers(len(accessible_tiles)))
+    if engine.game_world.current_floor < 10:
+        dungeon.tiles[placement_x, placement_y] = tile_types.down_stairs
+        dungeon.downstairs_location = (placement_x, placement_y)
 
-        for _ in range(max_rooms):
-            place_entities(dungeon, engine.game_world.current_floor, accessible_tiles)
+    for _ in range(max_rooms):
+        place_entities(dungeon, engine.game_world.current_floor, accessible_tiles, rng)
 
     return dungeon
 
@@ -547,44 +718,153 @@ def generate_simplex_noise_dungeon(map_width: int,
                                    map_height: int,
                                    engine: Engine,
                                    max_rooms: int,
-                                   seed: int
+                                   rng: np.random.Generator,
                                    ) -> GameMap:
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, entities=[player])
 
     accessible_tiles = []
+    dungeon.generation_attempts = 0
 
     scale_entities(floor=engine.game_world.current_floor)
 
     while len(accessible_tiles) <= 1000:
-        simplex_noise_floor = SimplexNoise(width=map_width, height=map_height, seed=seed)
-        simplex_noise_floor.initialize_map()
-
-        valid_spawn_locations = []
-
-        for x in range(map_width):
-            for y in range(map_height):
-                if simplex_noise_floor.map[x][y] >= -.5:
-                    dungeon.tiles[x][y] = tile_types.floor
-                    valid_spawn_locations.append((x, y))
-                else:
-                    dungeon.tiles[x][y] = tile_types.wall
-
-        placement_x, placement_y = random.choice(valid_spawn_locations)
+        dungeon.generation_attempts += 1
+        simplex_noise_floor = SimplexNoise(width=map_width, height=map_height, rng=rng)
+        floor = simplex_noise_floor.carve(dungeon.tiles)
+        if not floor.any():
+            continue
+
+        # pick random tiles until one is floor, rather than listing every floor tile of a possibly huge map.
+        placement_x, placement_y = int(rng.integers(map_width)), int(rng.integers(map_height))
+        while not floor[placement_x, placement_y]:
+            placement_x, placement_y = int(rng.integers(map_width)), int(rng.integers(map_height))
         player.place(placement_x, placement_y, dungeon)
         # cleans up the map
         accessible_tiles = flood_fill(player, dungeon)
 
-        if engine.game_world.current_floor > 1:
-            dungeon.tiles[placement_x][placement_y] = tile_types.up_stairs
-            dungeon.upstairs_location = (placement_x, placement_y)
+    # the map is only populated once it has enough room, so nothing is left behind from the maps thrown away.
+    if engine.game_world.current_floor > 1:
+        dungeon.tiles[player.x, player.y] = tile_types.up_stairs
+        dungeon.upstairs_location = (player.x, player.y)
 
-        placement_x, placement_y = accessible_tiles.pop()
-        if engine.game_world.current_floor < 10:
-            dungeon.tiles[placement_x][placement_y] = tile_types.down_stairs
-            dungeon.downstairs_location = (placement_x, placement_y)
+    placement_x, placement_y = accessible_tiles.pop(rng.integers(len(accessible_tiles)))
+    if engine.game_world.current_floor < 10:
+        dungeon.tiles[placement_x, placement_y] = tile_types.down_stairs
+        dungeon.downstairs_location = (placement_x, placement_y)
 
-        for _ in range(max_rooms):
-            place_entities(dungeon, engine.game_world.current_floor, accessible_tiles)
+    for _ in range(max_rooms):
+        place_entities(dungeon, engine.game_world.current_floor, accessible_tiles, rng)
 
     return dungeon
+
+
+def max_rooms_for(map_width: int, map_height: int) -> int:
+    """Return how many rooms to try for: 30 on the default 80x43 map, and the same density of rooms on bigger ones."""
+    return max(30, 30 * map_width * map_height // (80 * 43))
+
+
+class FloorSpec:
+    """
+    Everything needed to generate a floor, without a live Engine, so it can be sent to a worker process.
+
+    seed is the run seed; the floor's random number generator is derived from it and the floor number.
+    placed_unique_names are the unique entities already placed on earlier floors of the run, which this floor
+    mustn't place again.
+    """
+
+    def __init__(
+            self,
+            *,
+            procgen_type: str,
+            seed: int,
+            floor: int,
+            map_width: int,
+            map_height: int,
+            max_rooms: int,
+            room_min_size: int,
+            room_max_size: int,
+            placed_unique_names: FrozenSet[str] = frozenset(),
+    ):
+        self.procgen_type = procgen_type
+        self.seed = seed
+        self.floor = floor
+        self.map_width = map_width
+        self.map_height = map_height
+        self.max_rooms = max_rooms
+        self.room_min_size = room_min_size
+        self.room_max_size = room_max_size
+        self.placed_unique_names = placed_unique_names
+
+
+def generate_floor_from_spec(spec: FloorSpec, engine: Engine) -> GameMap:
+    """Generate the floor described by spec, for the given engine's player."""
+    rng = floor_rng(spec.seed, spec.floor)
+
+    if spec.procgen_type == "Rectangular Room":
+        return generate_rectangular_dungeon(
+            max_rooms=spec.max_rooms,
+            room_min_size=spec.room_min_size,
+            room_max_size=spec.room_max_size,
+            map_width=spec.map_width,
+            map_height=spec.map_height,
+            engine=engine,
+            rng=rng,
+        )
+
+    elif spec.procgen_type == "Cellular Automata":
+        return generate_cellular_automata_dungeon(
+            map_width=spec.map_width,
+            map_height=spec.map_height,
+            engine=engine,
+            number_of_steps=5,
+            max_rooms=spec.max_rooms,
+            rng=rng,
+        )
+
+    elif spec.procgen_type == "Simplex Noise":
+        return generate_simplex_noise_dungeon(
+            map_width=spec.map_width,
+            map_height=spec.map_height,
+            engine=engine,
+            max_rooms=spec.max_rooms,
+            rng=rng,
+        )
+
+    raise ValueError(f"Unknown procgen type: {spec.procgen_type}")
+
+
+def generate_detached_floor(spec: FloorSpec) -> Tuple[GameMap, float]:
+    """
+    Generate a floor inside a worker process, returning the map and how many seconds it took.
+
+    The generators need an engine and a player, so a stand-in pair is built here and stripped off the map before
+    it is returned.  GameWorld attaches the finished map to the real engine and places the real player on it.
+    """
+    import copy
+    import time
+
+    from engine import Engine
+    from game_map import GameWorld
+
+    engine = Engine(
+        player=copy.deepcopy(entity_factories.player), final_boss=copy.deepcopy(entity_factories.grim_reaper)
+    )
+    engine.game_world = GameWorld(
+        engine=engine,
+        map_width=spec.map_width,
+        map_height=spec.map_height,
+        max_rooms=spec.max_rooms,
+        room_min_size=spec.room_min_size,
+        room_max_size=spec.room_max_size,
+        current_floor=spec.floor,
+    )
+    engine.game_world.placed_unique_names = set(spec.placed_unique_names)
+
+    start = time.perf_counter()
+    dungeon = generate_floor_from_spec(spec, engine)
+    generation_time = time.perf_counter() - start
+
+    dungeon.remove_entity(engine.player)
+    dungeon.engine = None
+    return dungeon, generation_time
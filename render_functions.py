@@ -15,26 +15,31 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
         return ""
 
     names = ", ".join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
+        entity.name for entity in game_map.get_entities_at_location(x, y)
     )
 
     return names.capitalize()
 
 
 def render_bar(
-    console: Console, current_value: int, maximum_value: int, total_width: int
+    console: Console,
+    current_value: int,
+    maximum_value: int,
+    total_width: int,
+    location: Tuple[int, int] = (0, 45),
 ) -> None:
+    x, y = location
     bar_width = int(float(current_value) / maximum_value * total_width)
 
-    console.draw_rect(x=0, y=45, width=20, height=1, ch=1, bg=color.bar_empty)
+    console.draw_rect(x=x, y=y, width=total_width, height=1, ch=1, bg=color.bar_empty)
 
     if bar_width > 0:
         console.draw_rect(
-            x=0, y=45, width=bar_width, height=1, ch=1, bg=color.bar_filled
+            x=x, y=y, width=bar_width, height=1, ch=1, bg=color.bar_filled
         )
 
     console.print(
-        x=1, y=45, string=f"HP: {current_value}/{maximum_value}", fg=color.bar_text
+        x=x + 1, y=y, string=f"HP: {current_value}/{maximum_value}", fg=color.bar_text
     )
 
 
@@ -53,7 +58,7 @@ def render_seed(
         console: Console, seed_number: int, location: Tuple[int, int]
 ) -> None:
     """
-    Render the seed the player has for Simplex Noise
+    Render the seed the current run was generated from.
     """
     x, y = location
 
@@ -74,9 +79,16 @@ def render_names_at_mouse_location(
     console: Console, x: int, y: int, engine: Engine
 ) -> None:
     mouse_x, mouse_y = engine.mouse_location
-
-    names_at_mouse_location = get_names_at_location(
-        x=mouse_x, y=mouse_y, game_map=engine.game_map
-    )
+    game_map = engine.game_map
+
+    # the names only change when the mouse moves to another tile, or the entities or what the player can see
+    # change, so most frames reuse the last lookup.
+    key = mouse_x, mouse_y, game_map.entity_version, game_map.visibility_version
+    cached_key, names_at_mouse_location = game_map.names_at_mouse_cache
+    if cached_key != key:
+        names_at_mouse_location = get_names_at_location(
+            x=mouse_x, y=mouse_y, game_map=game_map
+        )
+        game_map.names_at_mouse_cache = key, names_at_mouse_location
 
     console.print(x=x, y=y, string=names_at_mouse_location)
\ No newline at end of file
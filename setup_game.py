@@ -5,33 +5,56 @@ import copy
 import lzma
 import pickle
 import traceback
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 
 import color
 from engine import Engine
 import entity_factories
+from floor_cache import floor_cache_from_environment
 from game_map import GameWorld
 import input_handlers
+import procgen
+
+if TYPE_CHECKING:
+    from floor_cache import FloorCache
+    from viewport import Viewport
 
 # Load the background image and remove the alpha channel.
 background_image = tcod.image.load("menu_background.png")[:, :, :3]
 
-
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
-    map_width = 80
-    map_height = 43
+# map size of the large map mode, which is far bigger than the camera and scrolls with the player.
+LARGE_MAP_WIDTH = 512
+LARGE_MAP_HEIGHT = 512
+
+
+def new_game(
+        seed: Optional[int] = None,
+        floor_cache: Optional[FloorCache] = None,
+        map_width: int = 80,
+        map_height: int = 43,
+        viewport: Optional[Viewport] = None,
+        pregenerate: bool = True,
+) -> Engine:
+    """
+    Return a brand new game session as an Engine instance.
+
+    Pass pregenerate=False to build every floor when it is reached instead of ahead of time in a worker process,
+    see GameWorld.  Without a floor_cache, floors are cached in the directory named by the ROGUELIKE_FLOOR_CACHE
+    environment variable, if it is set.
+    """
+    if floor_cache is None:
+        floor_cache = floor_cache_from_environment()
 
     room_max_size = 10
     room_min_size = 6
-    max_rooms = 30
+    max_rooms = procgen.max_rooms_for(map_width, map_height)
 
     player = copy.deepcopy(entity_factories.player)
     final_boss = copy.deepcopy(entity_factories.grim_reaper)
 
-    engine = Engine(player=player, final_boss=final_boss)
+    engine = Engine(player=player, final_boss=final_boss, seed=seed, viewport=viewport)
 
     engine.game_world = GameWorld(
         engine=engine,
@@ -40,6 +63,8 @@ def new_game() -> Engine:
         room_max_size=room_max_size,
         map_width=map_width,
         map_height=map_height,
+        floor_cache=floor_cache,
+        pregenerate=pregenerate,
     )
 
     engine.game_world.generate_floor()
@@ -55,6 +80,10 @@ def load_game(filename: str) -> Engine:
     with open(filename, "rb") as f:
         engine = pickle.loads(lzma.decompress(f.read()))
     assert isinstance(engine, Engine)
+    game_world = engine.game_world
+    for game_map in [engine.game_map, *game_world.upstairs_saves, *game_world.downstairs_saves]:
+        game_map.finish_loading()
+    game_world.pregenerate_next_floor()
     return engine
 
 
@@ -82,7 +111,7 @@ class MainMenu(input_handlers.BaseEventHandler):
 
         menu_width = 24
         for i, text in enumerate(
-                ["[N] Play a new game", "[C] Continue last game", "[Q] Quit"]
+                ["[N] Play a new game", "[L] Play a large map", "[C] Continue last game", "[Q] Quit"]
         ):
             console.print(
                 console.width // 2,
@@ -109,5 +138,9 @@ class MainMenu(input_handlers.BaseEventHandler):
                 return input_handlers.PopupMessage(self, f"Failed to load save:\n{exc}")
         elif event.sym == tcod.event.K_n:
             return input_handlers.MainGameEventHandler(new_game())
+        elif event.sym == tcod.event.K_l:
+            return input_handlers.MainGameEventHandler(
+                new_game(map_width=LARGE_MAP_WIDTH, map_height=LARGE_MAP_HEIGHT)
+            )
 
         return None
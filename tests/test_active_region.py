@@ -0,0 +1,27 @@
+"""Checks which part of the map monsters take their turns in."""
+import setup_game
+
+
+def test_whole_default_map_is_active_wherever_the_player_is():
+    engine = setup_game.new_game(seed=5, pregenerate=False)
+    game_map = engine.game_map
+    assert (game_map.width, game_map.height) == (80, 43)
+
+    for x, y in [(2, 2), (77, 40), (2, 40), (77, 2), (40, 21)]:
+        engine.player.place(x, y)
+        assert engine.active_region() == (slice(0, 80), slice(0, 43)), (x, y)
+
+
+def test_large_map_region_is_the_camera_grown_by_the_margin():
+    engine = setup_game.new_game(seed=5, map_width=256, map_height=256, pregenerate=False)
+    margin = engine.viewport.active_margin
+
+    engine.player.place(128, 128)
+    x_start, y_start, x_end, y_end = engine.game_map.camera_window()
+    assert engine.active_region() == (
+        slice(x_start - margin, x_end + margin), slice(y_start - margin, y_end + margin)
+    )
+
+    # at the edge of the map the camera stops, and the region goes as far past it as the margin allows.
+    engine.player.place(1, 254)
+    assert engine.active_region() == (slice(0, 80 + margin), slice(256 - 43 - margin, 256))
@@ -0,0 +1,91 @@
+"""Checks that ChunkedArray reads and writes like the dense array it stands in for."""
+import numpy as np  # type: ignore
+import pytest
+
+from chunked_array import ChunkedArray
+import tile_types
+
+
+def make_pair(shape=(70, 45), chunk_size=16):
+    """Return a ChunkedArray and the dense array it should always equal."""
+    return ChunkedArray(shape, np.int16, 7, chunk_size), np.full(shape, 7, dtype=np.int16)
+
+
+def test_untouched_array_reads_as_fill_value_without_chunks():
+    chunked, dense = make_pair()
+    assert np.array_equal(np.asarray(chunked), dense)
+    assert chunked[69, 44] == 7
+    assert chunked.nbytes == 0
+    assert chunked.allocated_window() is None
+
+
+def test_windows_scalars_points_and_masks_match_a_dense_array():
+    chunked, dense = make_pair()
+    rng = np.random.default_rng(1)
+
+    for _ in range(50):
+        x0, x1 = sorted(rng.integers(0, 71, 2).tolist())
+        y0, y1 = sorted(rng.integers(0, 46, 2).tolist())
+        values = rng.integers(0, 5, (x1 - x0, y1 - y0))
+        chunked[x0:x1, y0:y1] = values
+        dense[x0:x1, y0:y1] = values
+        assert np.array_equal(chunked[x0:x1, y0:y1], dense[x0:x1, y0:y1])
+
+    chunked[3, 40] = 99
+    dense[3, 40] = 99
+    chunked[5, :] = 11
+    dense[5, :] = 11
+    chunked[:, 2] = np.arange(70)
+    dense[:, 2] = np.arange(70)
+
+    xs, ys = rng.integers(0, 70, 30), rng.integers(0, 45, 30)
+    chunked[xs, ys] = 42
+    dense[xs, ys] = 42
+    assert np.array_equal(chunked[xs, ys], dense[xs, ys])
+
+    mask = rng.random((70, 45)) < 0.1
+    chunked[mask] = 3
+    dense[mask] = 3
+
+    assert np.array_equal(np.asarray(chunked), dense)
+    assert np.array_equal(chunked[5, 10:30], dense[5, 10:30])
+    assert np.array_equal(chunked[10:30, 2], dense[10:30, 2])
+    assert chunked[3, 40] == dense[3, 40]
+
+
+def test_writing_fill_value_back_frees_chunks():
+    chunked, _ = make_pair()
+    chunked[0:20, 0:20] = 1
+    assert chunked.chunks
+    chunked[...] = 7
+    assert not chunked.chunks
+
+    chunked[5, 5] = 1
+    chunked[np.asarray(chunked) == 1] = 7
+    assert not chunked.chunks
+
+
+def test_allocated_window_covers_written_chunks():
+    chunked, _ = make_pair()
+    chunked[20, 5] = 1
+    chunked[50, 40] = 1
+    assert chunked.allocated_window() == (slice(16, 64), slice(0, 45))
+
+
+def test_structured_records_and_field_access():
+    records = np.full((40, 40), tile_types.palette[tile_types.wall], dtype=tile_types.tile_dt)
+    records[3:9, 3:9] = tile_types.palette[tile_types.floor]
+    chunked = ChunkedArray.from_array(records, tile_types.palette[tile_types.wall])
+
+    assert len(chunked.chunks) == 1
+    assert np.array_equal(chunked["walkable"], records["walkable"])
+
+
+def test_out_of_bounds_and_stepped_indexes_raise():
+    chunked, _ = make_pair()
+    with pytest.raises(IndexError):
+        chunked[70, 0]
+    with pytest.raises(IndexError):
+        chunked[np.array([0, 70]), np.array([0, 0])]
+    with pytest.raises(IndexError):
+        chunked[0:10:2, 0:10]
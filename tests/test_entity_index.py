@@ -0,0 +1,73 @@
+"""Checks that GameMap's position index and entity collections follow the entities through play."""
+import copy
+
+import pytest
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+import tile_types
+
+
+@pytest.fixture
+def game_map() -> GameMap:
+    engine = Engine(
+        player=copy.deepcopy(entity_factories.player), final_boss=copy.deepcopy(entity_factories.grim_reaper), seed=1
+    )
+    game_map = GameMap(engine, 30, 20, entities=[engine.player])
+    game_map.tiles[1:29, 1:19] = tile_types.floor
+    engine.game_map = game_map
+    engine.player.place(5, 5, game_map)
+    return game_map
+
+
+def test_index_follows_spawns_moves_and_removals(game_map):
+    orc = entity_factories.orc.spawn(game_map, 10, 10)
+    potion = entity_factories.health_potion.spawn(game_map, 10, 10)
+    game_map.check_entity_index()
+    assert set(game_map.get_entities_at_location(10, 10)) == {orc, potion}
+    assert game_map.get_blocking_entity_at_location(10, 10) is orc
+    assert set(game_map.actors) == {game_map.engine.player, orc}
+    assert game_map.items == (potion,)
+
+    orc.move(1, 0)
+    game_map.check_entity_index()
+    assert game_map.get_blocking_entity_at_location(10, 10) is None
+    assert game_map.get_actor_at_location(11, 10) is orc
+
+    orc.place(15, 15)
+    game_map.remove_entity(potion)
+    game_map.check_entity_index()
+    assert game_map.get_entities_at_location(10, 10) == []
+    assert game_map.items == ()
+    assert orc in game_map.get_actors_in_region(game_map.region_around(15, 15, 1, 1))
+
+
+def test_dead_actors_move_to_corpses(game_map):
+    orc = entity_factories.orc.spawn(game_map, 10, 10)
+    orc.fighter.hp = 0
+    game_map.check_entity_index()
+    assert orc in game_map.corpses
+    assert orc not in game_map.actors
+    assert game_map.get_blocking_entity_at_location(10, 10) is None
+
+
+def test_moving_between_maps(game_map):
+    other_map = GameMap(game_map.engine, 30, 20)
+    orc = entity_factories.orc.spawn(game_map, 10, 10)
+    orc.place(3, 3, other_map)
+    game_map.check_entity_index()
+    other_map.check_entity_index()
+    assert orc not in game_map.entities
+    assert other_map.get_actor_at_location(3, 3) is orc
+
+
+def test_check_catches_drift_and_rebuild_repairs_it(game_map):
+    orc = entity_factories.orc.spawn(game_map, 10, 10)
+    orc.x = 12  # Moved without going through move or place.
+    with pytest.raises(AssertionError):
+        game_map.check_entity_index()
+
+    game_map.rebuild_entity_index()
+    game_map.check_entity_index()
+    assert game_map.get_actor_at_location(12, 10) is orc
@@ -0,0 +1,53 @@
+"""Checks that floors come back out of the floor cache the way they went in."""
+import random
+
+import numpy as np  # type: ignore
+
+import entity_factories
+from floor_cache import FloorCache
+import setup_game
+
+
+def spawn_list(game_map):
+    return sorted(
+        (entity.prototype_key, entity.x, entity.y) for entity in game_map.entities
+        if entity is not game_map.engine.player
+    )
+
+
+def new_game(floor_cache):
+    random.seed(0)  # The procgen type is picked at random, and is part of the cache key.
+    return setup_game.new_game(seed=11, floor_cache=floor_cache, pregenerate=False)
+
+
+def test_round_trip_rebuilds_the_same_floor(tmp_path, monkeypatch):
+    floor_cache = FloorCache(str(tmp_path))
+    engine = new_game(floor_cache)
+    stored = engine.game_map
+    assert floor_cache.misses == 1 and len(list(tmp_path.iterdir())) == 1
+
+    # display names are free to change, the cache finds prototypes by their key.
+    monkeypatch.setattr(entity_factories.health_potion, "name", "Renamed Potion")
+    monkeypatch.setattr(entity_factories.orc, "name", "Renamed Orc")
+
+    other_engine = new_game(floor_cache)
+    loaded = other_engine.game_map
+    assert floor_cache.hits == 1
+    assert np.array_equal(np.asarray(loaded.tiles), np.asarray(stored.tiles))
+    assert spawn_list(loaded) == spawn_list(stored)
+    assert (other_engine.player.x, other_engine.player.y) == (engine.player.x, engine.player.y)
+    assert loaded.unique_names == stored.unique_names
+    loaded.check_entity_index()
+
+
+def test_unknown_prototype_key_is_a_miss(tmp_path, monkeypatch):
+    floor_cache = FloorCache(str(tmp_path))
+    engine = new_game(floor_cache)
+    assert spawn_list(engine.game_map), "the floor has nothing on it to look up"
+
+    for key, _, _ in spawn_list(engine.game_map):
+        monkeypatch.delattr(entity_factories, key, raising=False)
+
+    spec = engine.game_world.floor_spec(1)
+    assert floor_cache.load(spec, engine) is None
+    assert floor_cache.misses == 2
@@ -0,0 +1,48 @@
+"""Checks that the paths HostileEnemy keeps between turns are patched or planned again when they stop working."""
+import copy
+
+import pytest
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+import tile_types
+
+
+@pytest.fixture
+def engine() -> Engine:
+    engine = Engine(
+        player=copy.deepcopy(entity_factories.player), final_boss=copy.deepcopy(entity_factories.grim_reaper), seed=1
+    )
+    game_map = GameMap(engine, 40, 20, entities=[engine.player])
+    game_map.tiles[1:39, 1:19] = tile_types.floor
+    engine.game_map = game_map
+    engine.player.place(35, 10, game_map)
+    return engine
+
+
+def test_blocker_on_the_path_is_stepped_around(engine):
+    orc = entity_factories.orc.spawn(engine.game_map, 5, 10)
+    orc.ai.plan_path(30, 10)
+    blocked_x, blocked_y = orc.ai.path[0]
+    entity_factories.orc.spawn(engine.game_map, blocked_x, blocked_y)
+
+    step = orc.ai.next_step()
+    assert step is not None and step != (blocked_x, blocked_y)
+    assert orc.ai.is_free(*step)
+    assert engine.path_repairs == 1 and engine.path_replans == 1
+    assert orc.ai.path[-1] == (30, 10)
+
+
+def test_changed_tiles_make_the_path_planned_again(engine):
+    orc = entity_factories.orc.spawn(engine.game_map, 5, 10)
+    orc.ai.plan_path(30, 10)
+    orc.ai.plan_path(30, 10)
+    assert engine.path_replans == 1  # Nothing changed, so the path was kept.
+
+    # wall off the column the path goes through, apart from a gap at the top.
+    engine.game_map.tiles[15, 2:19] = tile_types.wall
+    orc.ai.plan_path(30, 10)
+    assert engine.path_replans == 2
+    assert all(engine.game_map.walkable((x, y)) for x, y in orc.ai.path)
+    assert (15, 1) in orc.ai.path
@@ -0,0 +1,60 @@
+"""Checks for the floor generators' spawning rules."""
+import collections
+
+import numpy as np  # type: ignore
+import pytest
+
+import procgen
+import setup_game
+
+
+@pytest.fixture
+def uniques_always_rolled(monkeypatch):
+    """Make every unique entity on every floor roll a 100% chance to be placed."""
+    for floor in range(1, 11):
+        table = procgen.floor_tables(floor).unique_entities
+        monkeypatch.setattr(table, "lower_bounds", np.full_like(table.lower_bounds, 100))
+        monkeypatch.setattr(table, "upper_bounds", np.full_like(table.upper_bounds, 100))
+
+
+@pytest.mark.parametrize("procgen_type", ["Rectangular Room", "Cellular Automata", "Simplex Noise"])
+def test_unique_entities_are_placed_once_per_run(uniques_always_rolled, procgen_type):
+    engine = setup_game.new_game(seed=7, pregenerate=False)
+    engine.procgen_type = procgen_type
+    game_world = engine.game_world
+
+    placed_on = collections.defaultdict(list)
+    for _ in range(6):
+        game_map = engine.game_map
+        for name in game_map.unique_names:
+            placed_on[name].append(game_world.current_floor)
+        game_world.generate_floor()
+
+    assert placed_on, "no unique entities were placed"
+    assert {name: floors for name, floors in placed_on.items() if len(floors) > 1} == {}
+    assert set(placed_on) <= game_world.placed_unique_names
+
+
+def test_floor_spec_carries_placed_unique_names():
+    engine = setup_game.new_game(seed=7, pregenerate=False)
+    engine.game_world.placed_unique_names = {"Bow"}
+    spec = engine.game_world.floor_spec(2)
+    assert spec.placed_unique_names == frozenset({"Bow"})
+
+
+def test_accessible_tiles_sample_hands_out_each_free_tile_once():
+    rng = np.random.default_rng(3)
+    mask = rng.random((60, 40)) < 0.3
+    accessible_tiles = procgen.AccessibleTiles(mask.copy())
+
+    first = accessible_tiles.sample(50, rng)
+    accessible_tiles.discard(tuple(np.argwhere(accessible_tiles.mask)[0].tolist()))
+    in_room = accessible_tiles.sample(10, rng, area=(slice(0, 20), slice(0, 20)))
+    rest = accessible_tiles.sample(len(accessible_tiles) + 100, rng)
+
+    handed_out = np.concatenate([first, in_room, rest]).tolist()
+    assert len(handed_out) == len(set(map(tuple, handed_out))) == int(mask.sum()) - 1
+    assert all(mask[x, y] for x, y in handed_out)
+    assert all(x < 20 and y < 20 for x, y in in_room.tolist())
+    assert len(accessible_tiles) == 0 and not accessible_tiles.mask.any()
+    assert len(accessible_tiles.sample(5, rng)) == 0
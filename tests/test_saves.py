@@ -0,0 +1,16 @@
+"""Checks that games saved by older versions still load and play on."""
+import pickle
+
+import setup_game
+
+
+def test_save_without_a_run_seed_can_go_down_the_stairs():
+    engine = setup_game.new_game(seed=3, pregenerate=False)
+    engine.seed = "None"  # What saves made before runs had a seed hold.
+
+    loaded = pickle.loads(pickle.dumps(engine))
+    assert isinstance(loaded.seed, int)
+
+    loaded.game_world.generate_floor()
+    assert loaded.game_world.current_floor == 2
+    assert loaded.player.gamemap is loaded.game_map
@@ -36,27 +36,49 @@ def new_tile(
 # SHROUD represents unexplored, unseen tiles
 SHROUD = np.array((ord(" "), (255, 255, 255), (0, 0, 0)), dtype=graphic_dt)
 
-floor = new_tile(
+_floor = new_tile(
     walkable=True,
     transparent=True,
     dark=(ord(" "), (255, 255, 255), (50, 50, 150)),
     light=(ord(" "), (255, 255, 255), (200, 180, 50)),
 )
-wall = new_tile(
+_wall = new_tile(
     walkable=False,
     transparent=False,
     dark=(ord(" "), (255, 255, 255), (0, 0, 100)),
     light=(ord(" "), (255, 255, 255), (130, 110, 50)),
 )
-down_stairs = new_tile(
+_down_stairs = new_tile(
     walkable=True,
     transparent=True,
     dark=(ord(">"), (0, 0, 100), (50, 50, 150)),
     light=(ord(">"), (255, 255, 255), (200, 180, 50)),
 )
-up_stairs = new_tile(
+_up_stairs = new_tile(
     walkable=True,
     transparent=True,
     dark=(ord("<"), (0, 0, 100), (50, 50, 150)),
     light=(ord("<"), (255, 255, 255), (200, 180, 50)),
 )
+
+# maps store a grid of uint8 tile ids, which index into this palette, rather than a tile_dt record per tile.
+# new tiles go on the end, since the ids are kept in saves and the floor cache.
+palette = np.array([_wall, _floor, _down_stairs, _up_stairs], dtype=tile_dt)
+wall, floor, down_stairs, up_stairs = range(len(palette))
+
+# one contiguous lookup table per field, so `walkable[tile_ids]` gives the walkable grid tcod wants in one step.
+walkable = np.ascontiguousarray(palette["walkable"])
+transparent = np.ascontiguousarray(palette["transparent"])
+dark = np.ascontiguousarray(palette["dark"])
+light = np.ascontiguousarray(palette["light"])
+
+
+def ids_of(tiles: np.ndarray) -> np.ndarray:
+    """Return the palette ids of an array of tile_dt records, for maps saved before tiles were stored as ids."""
+    # records are compared as raw bytes, which is much quicker than comparing them field by field.
+    raw_dtype = np.dtype((np.void, tile_dt.itemsize))
+    raw_tiles = np.ascontiguousarray(tiles).view(raw_dtype)
+    ids = np.full(tiles.shape, wall, dtype=np.uint8)
+    for tile_id, raw_tile in enumerate(palette.view(raw_dtype)):
+        ids[raw_tiles == raw_tile] = tile_id
+    return ids
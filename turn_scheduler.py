@@ -0,0 +1,84 @@
+"""Decides which monsters act after each player turn, and in what order."""
+from __future__ import annotations
+
+import heapq
+import time
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+import exceptions
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+# an actor with this speed acts once per player turn, one with twice it acts twice, and one with half it acts every
+# other turn.
+NORMAL_SPEED = 100
+
+# how many ticks of game time a player turn lasts.
+TURN_TICKS = 100
+
+
+class TurnScheduler:
+    """
+    A priority queue of monsters keyed by the tick they act next, so each turn only looks at the monsters that are
+    due, and they always act in the same order.
+
+    Monsters join the queue when they are first seen in the engine's active region, and leave it once they are due
+    but dead, on another floor or outside the active region, so the queue stays about the size of the active region.
+    Ties are broken by the order monsters joined the queue in.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0  # Tick the current player turn started at.
+        self._queue: List[Tuple[int, int, Actor]] = []
+        # the tick each queued monster acts next.  queue entries that don't match it are stale and skipped.
+        self._next_action_times: Dict[Actor, int] = {}
+        self._joined = 0  # How many times a monster joined the queue, for breaking ties.
+
+        # how many actions each kind of monster took, and the seconds their AI spent taking them.
+        self.actions_by_name: Dict[str, int] = {}
+        self.seconds_by_name: Dict[str, float] = {}
+
+    def schedule(self, actor: Actor, next_action_time: int) -> None:
+        self._next_action_times[actor] = next_action_time
+        heapq.heappush(self._queue, (next_action_time, self._joined, actor))
+        self._joined += 1
+
+    def run_turn(self, engine: Engine) -> None:
+        """Let every monster that is due before the end of this player turn act, in order."""
+        region = engine.active_region()
+        for actor in engine.game_map.get_actors_in_region(region):
+            if actor is not engine.player and actor not in self._next_action_times:
+                self.schedule(actor, self.time)
+
+        self.time += TURN_TICKS
+        x_slice, y_slice = region
+        while self._queue and self._queue[0][0] < self.time:
+            next_action_time, _, actor = heapq.heappop(self._queue)
+            if self._next_action_times.get(actor) != next_action_time:
+                continue
+            del self._next_action_times[actor]
+
+            if not actor.is_alive or actor.gamemap is not engine.game_map \
+                    or not x_slice.start <= actor.x < x_slice.stop or not y_slice.start <= actor.y < y_slice.stop:
+                continue  # It joins the queue again if it comes back into the active region.
+
+            start = time.perf_counter()
+            try:
+                actor.ai.perform()
+            except exceptions.Impossible:
+                pass  # Ignore impossible action exceptions from AI.
+            self.actions_by_name[actor.name] = self.actions_by_name.get(actor.name, 0) + 1
+            self.seconds_by_name[actor.name] = self.seconds_by_name.get(actor.name, 0.0) + time.perf_counter() - start
+
+            if actor.is_alive:
+                self.schedule(actor, next_action_time + TURN_TICKS * NORMAL_SPEED // actor.speed)
+
+    def summary(self) -> str:
+        actions = sum(self.actions_by_name.values())
+        seconds = sum(self.seconds_by_name.values())
+        slowest = sorted(self.seconds_by_name, key=self.seconds_by_name.get, reverse=True)[:3]
+        return f"{actions} monster actions, {seconds * 1000:.1f} ms in AI" + (
+            f", most in {', '.join(slowest)}" if slowest else ""
+        )
@@ -0,0 +1,52 @@
+"""Where the map camera and the HUD are laid out on the console."""
+from __future__ import annotations
+
+from typing import Tuple
+
+
+class Viewport:
+    """
+    The size of the map camera, and where each HUD element is drawn relative to the top row of the HUD.
+
+    The camera also decides the active region, the part of the map around the player that enemies take their turns
+    and find their paths in.  It is the camera grown by active_margin tiles on every side, so on maps no bigger than
+    the camera the whole map is active, and on large maps the work done per turn doesn't grow with the map.
+    """
+
+    def __init__(
+            self,
+            camera_width: int = 80,
+            camera_height: int = 43,
+            hud_y: int = 44,
+            active_margin: int = 16,
+    ):
+        self.camera_width = camera_width
+        self.camera_height = camera_height
+        self.hud_y = hud_y
+        self.active_margin = active_margin
+
+    @property
+    def names_location(self) -> Tuple[int, int]:
+        """Where the names of the entities under the mouse are printed."""
+        return 21, self.hud_y
+
+    @property
+    def health_bar_location(self) -> Tuple[int, int]:
+        return 0, self.hud_y + 1
+
+    @property
+    def message_log_area(self) -> Tuple[int, int, int, int]:
+        """The x, y, width and height of the message log."""
+        return 33, self.hud_y + 1, 40, 5
+
+    @property
+    def dungeon_level_location(self) -> Tuple[int, int]:
+        return 0, self.hud_y + 3
+
+    @property
+    def seed_location(self) -> Tuple[int, int]:
+        return 0, self.hud_y + 4
+
+    @property
+    def procgen_type_location(self) -> Tuple[int, int]:
+        return 0, self.hud_y + 5